@@ -0,0 +1,70 @@
+"""
+Memory used by the `Page` objects of a large site.
+
+Compares the slotted `Page` with an equivalent class that stores
+its attributes in a `__dict__`, like it was done before.
+
+    python benchmarks/page_memory.py [NUM_PAGES]
+
+"""
+import sys
+import tracemalloc
+
+from claydocs.nav import NULL_PAGE, Page
+
+
+NUM_PAGES = 50_000
+
+
+class DictPage:
+    def __init__(self, **kwargs):
+        kwargs.setdefault("meta", {})
+        kwargs.setdefault("toc", [])
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+def make_pages(cls, num: int, null_page) -> list:
+    pages = []
+    for index in range(num):
+        page = cls(
+            lang="en",
+            url=f"/section-{index // 100}/page-{index}",
+            base_url="/",
+            filename=f"section-{index // 100}/page-{index}.md",
+            title=f"Page {index}",
+            index=index,
+            section=f"Section {index // 100}",
+            description="",
+            cache_path=None,
+        )
+        pages.append(page)
+
+    for prev_page, next_page in zip(pages, pages[1:]):
+        prev_page.next_page = next_page
+        next_page.prev_page = prev_page
+    pages[0].prev_page = null_page() if callable(null_page) else null_page
+    pages[-1].next_page = null_page() if callable(null_page) else null_page
+    return pages
+
+
+def measure(cls, num: int, null_page) -> int:
+    tracemalloc.start()
+    pages = make_pages(cls, num, null_page)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del pages
+    return size
+
+
+def run(num: int = NUM_PAGES) -> None:
+    before = measure(DictPage, num, DictPage)
+    after = measure(Page, num, NULL_PAGE)
+    print(f"{num} pages")
+    print(f"  __dict__ pages: {before / 1024 / 1024:8.2f} MB")
+    print(f"  slotted pages:  {after / 1024 / 1024:8.2f} MB")
+    print(f"  {before / after:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_PAGES)
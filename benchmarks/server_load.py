@@ -0,0 +1,65 @@
+"""
+Requests per second of the development server under parallel load.
+
+Every client keeps its connection open and requests pages, that are
+rendered by a fake `get_page` of the given size, in a loop.
+
+    python benchmarks/server_load.py [NUM_CLIENTS] [NUM_REQUESTS]
+
+"""
+import http.client
+import sys
+import threading
+import time
+
+from claydocs.server import LiveReloadServer
+
+
+NUM_CLIENTS = 50
+NUM_REQUESTS = 100
+PAGE_SIZE = 100 * 1024
+
+PAGE = "<html><body>{}</body></html>".format("x" * PAGE_SIZE)
+
+
+def get_page(path: str) -> str:
+    return PAGE
+
+
+def client(port: int, num: int, errors: list) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    for index in range(num):
+        conn.request("GET", f"/page-{index}")
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            errors.append(response.status)
+
+
+def run(num_clients: int = NUM_CLIENTS, num_requests: int = NUM_REQUESTS) -> None:
+    server = LiveReloadServer(get_page, lambda paths: None, host="127.0.0.1", port=0)
+    server.start()
+    errors: list = []
+    try:
+        clients = [
+            threading.Thread(target=client, args=(server.port, num_requests, errors))
+            for _ in range(num_clients)
+        ]
+        start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    total = num_clients * num_requests
+    print(f"{num_clients} clients x {num_requests} requests of {PAGE_SIZE // 1024} KB pages")
+    print(f"  {total / elapsed:8.0f} requests/s")
+    print(f"  {len(errors)} errors")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,99 @@
+"""
+Time to extract the search docs of large pages.
+
+Compares the `TextExtractor` with a subclass that normalizes every
+text chunk by itself, when it's parsed, like it was done before.
+
+    python benchmarks/text_extractor.py [NUM_SECTIONS]
+
+"""
+import html
+import random
+import sys
+import timeit
+
+from claydocs.indexer.text_extractor import (
+    TextExtractor,
+    rx_multiple_spaces,
+    rx_non_text,
+)
+
+
+NUM_SECTIONS = 2_000
+REPEAT = 5
+
+WORDS = (
+    "the docs of a project are written in Markdown and rendered with Jinja "
+    "templates. Use pip install claydocs, then run python docs.py build -- "
+    "see the user-guide/ for more. A page can have tags, a table of contents "
+    "and a list of next steps... Really!"
+).split(" ")
+
+
+class PerChunkExtractor(TextExtractor):
+    def handle_data(self, data: str):
+        if not (self._in_page and self._capture):
+            return
+
+        if self._in_header:
+            self._title.append(data)
+            return
+
+        escaped = html.escape(data)
+        if not self._in_pre:
+            escaped = rx_multiple_spaces.sub(" ", escaped)
+        if not self._in_code:
+            data = rx_non_text.sub(" ", data)
+
+        # Nothing is left to normalize when the section is saved
+        self._body.append(escaped)
+        self._raw.append(data)
+        self._body_start = len(self._body)
+        self._raw_start = len(self._raw)
+
+
+def make_text(rnd: random.Random, num_words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(num_words))
+
+
+def make_page(num_sections: int) -> str:
+    rnd = random.Random(num_sections)
+    parts = ["<html><body><!--startpage-->"]
+    for num in range(num_sections):
+        parts.append(f"<h2 id='s{num}'>Section {num}</h2>")
+        for _ in range(3):
+            parts.append(
+                f"<p>{make_text(rnd, 30)} <code>x.y_z</code> "
+                f"<a href='#s{num}'>{make_text(rnd, 2)}</a> {make_text(rnd, 20)}</p>"
+            )
+        parts.append(f"<ul><li>{make_text(rnd, 8)}</li><li>{make_text(rnd, 8)}</li></ul>")
+        parts.append(f"<pre><code>$ {make_text(rnd, 6)}\n  {make_text(rnd, 6)}</code></pre>")
+    parts.append("<!--endpage--></body></html>")
+    return "\n".join(parts)
+
+
+def extract(cls, page: str) -> list:
+    parser = cls(page_title="Page", base_loc="/page")
+    parser.feed(page)
+    parser.close()
+    return parser.docs
+
+
+def measure(cls, page: str) -> float:
+    return min(timeit.repeat(lambda: extract(cls, page), number=1, repeat=REPEAT))
+
+
+def run(num: int = NUM_SECTIONS) -> None:
+    page = make_page(num)
+    assert extract(PerChunkExtractor, page) == extract(TextExtractor, page)
+
+    before = measure(PerChunkExtractor, page)
+    after = measure(TextExtractor, page)
+    print(f"{num} sections, {len(page) / 1024:.0f} KB")
+    print(f"  per chunk:   {before * 1000:8.1f} ms")
+    print(f"  per section: {after * 1000:8.1f} ms")
+    print(f"  {before / after:.2f}x faster")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_SECTIONS)
@@ -1,3 +1,4 @@
+import gzip
 import json
 import sys
 import shutil
@@ -6,15 +7,18 @@ import typing as t
 from pathlib import Path
 from signal import SIGTERM, signal
 
-from .indexer import Indexer
+from .indexer import Indexer, compact
+from .indexer.search_cache import SEARCH_CACHE
+from .indexer.shards import SHARDS_FOLDER, write_shards
 from .docs_builder import DocsBuilder
 from .docs_render import DocsRender
 from .docs_server import DocsServer
 from .nav import DEFAULT_LANG, Nav, TPages
-from .utils import DocsMetadata, logger
+from .nav_index import NAV_INDEX
+from .utils import DocsMetadata, MarkdownCache, logger
 
 
-VALID_COMMANDS = ("serve", "build", "index")
+VALID_COMMANDS = ("serve", "build", "index", "preview")
 INDEX_JSON = "search-{lang}.json"
 
 
@@ -31,7 +35,11 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
         domain: str = "",
         base_url: str = "/",
         search: bool = True,
+        search_shards: bool = False,
+        search_compact: bool = False,
+        search_gzip: bool = False,
         cache: bool = True,
+        watch_polling: bool = False,
         add_ons: list[t.Any] | None = None,
 
         default_component: str = "Page",
@@ -83,6 +91,9 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
         logger.debug(f"static_folder is {self.static_folder}")
 
         self.cache = cache
+        # Check the files for changes by polling instead of with the native
+        # notifications of the OS, that may not work in network filesystems
+        self.watch_polling = watch_polling
         if cache:
             self.cache_folder = (root / CACHE_FOLDER).resolve()
             logger.debug(f"cache_folder is {self.cache_folder}")
@@ -98,6 +109,7 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
         self.temp_folder = Path(tempfile.mkdtemp())
 
         self.add_ons = add_ons or []
+        self.md_cache = MarkdownCache()
 
         self.nav = Nav(
             self.content_folder,
@@ -106,10 +118,18 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
             base_url=base_url,
             languages=languages or {},
             default=default,
+            index_path=self.cache_folder / NAV_INDEX if cache else None,
         )
 
         self.search = search
-        self.indexer = Indexer(self.root, self.render) if search else None
+        self.search_shards = search_shards
+        self.search_compact = search_compact
+        self.search_gzip = search_gzip
+        self.indexer = Indexer(
+            self.root,
+            self.render,
+            cache_path=self.cache_folder / SEARCH_CACHE if cache else None,
+        ) if search else None
 
         self.__init_renderer__(
             globals=globals,
@@ -119,6 +139,31 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
             md_extensions=md_extensions,
             md_ext_config=md_ext_config,
         )
+        self.catalog.jinja_env.globals["search"] = self.get_search_config()
+
+    def get_search_config(self) -> dict[str, t.Any] | None:
+        """
+        The format and the URLs, by language, of the search data written
+        by the `index` command, used by the `Search` component.
+        """
+        if not self.search:
+            return None
+        if self.search_shards:
+            search_format = "shards"
+            name = f"{SHARDS_FOLDER}/"
+        else:
+            # The compact format is detected when loaded, and if gzipped,
+            # the static files server sends the `.gz` file instead.
+            search_format = "json"
+            name = INDEX_JSON
+        return {
+            "format": search_format,
+            "default": self.nav.default,
+            "urls": {
+                lang: f"{self.static_url}/{name.format(lang=lang)}"
+                for lang in self.nav.toc
+            },
+        }
 
     def add_folder(self, folder: str | Path, *, prefix: str = "") -> None:
         self.catalog.add_folder(folder, prefix=prefix)
@@ -132,20 +177,21 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
 
         signal(SIGTERM, sigterm_handler)
 
-        self.__init_server__()
-
         try:
             py, *sysargs = sys.argv
             cmd = sysargs[0] if sysargs else "serve"
             if cmd not in VALID_COMMANDS:
                 return self.cmd_help(py)
             if cmd == "serve":
+                self.__init_server__()
                 self.cmd_index()
                 self.cmd_serve()
             elif cmd == "build":
                 self.cmd_build()
             elif cmd == "index":
                 self.cmd_index()
+            elif cmd == "preview":
+                self.cmd_preview()
         finally:
             shutil.rmtree(self.temp_folder, ignore_errors=True)
             sys.stderr.write("\n")
@@ -156,10 +202,21 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
         pages = list(self.nav.pages.values())
         data = self.indexer.index(pages)
         indent = None
+        separators = (",", ":") if self.search_compact else None
 
         for lang, langdata in data.items():
+            if self.search_shards:
+                folder = self.static_folder / SHARDS_FOLDER.format(lang=lang)
+                write_shards(folder, langdata["docs"], langdata["index"])
+                continue
+            if self.search_compact:
+                langdata = compact.encode(langdata["docs"], langdata["index"])
             filepath = self.static_folder / INDEX_JSON.format(lang=lang)
-            filepath.write_text(json.dumps(langdata, indent=indent))
+            payload = json.dumps(langdata, indent=indent, separators=separators)
+            filepath.write_text(payload)
+            if self.search_gzip:
+                gz_filepath = filepath.with_name(f"{filepath.name}.gz")
+                gz_filepath.write_bytes(gzip.compress(payload.encode(), mtime=0))
 
     def cmd_serve(self):
         self.cache_pages()
@@ -168,6 +225,9 @@ class Docs(DocsBuilder, DocsRender, DocsServer):
     def cmd_build(self):
         self.build()
 
+    def cmd_preview(self):
+        self.preview()
+
     def cmd_help(self, py: str):
         print("\nValid commands:")
         for cmd in VALID_COMMANDS:
@@ -3,11 +3,12 @@ import shutil
 import typing as t
 from pathlib import Path
 
-from html2image import Html2Image
-
 from .nav import Page
 from .utils import THasRender, logger, print_random_messages
 
+if t.TYPE_CHECKING:
+    from html2image import Html2Image
+
 
 RX_ABS_URL = re.compile(
     r"""(\s(?:src|href|data-[a-z0-9_-]+)\s*=\s*['"])(\/(?:[a-z0-9_-][^'"]*)?)(['"])""",
@@ -19,9 +20,12 @@ SOCIAL_CARD_SIZE = (1200, 630)
 
 class DocsBuilder(THasRender if t.TYPE_CHECKING else object):
     relativize_static: bool = False
-    hti: Html2Image
+    hti: "Html2Image"
+    static_files: t.Any = None
 
     def build(self) -> None:
+        from html2image import Html2Image
+
         if self.build_folder.exists():
             shutil.rmtree(self.build_folder)
         self.build_folder.mkdir(exist_ok=True)
@@ -136,7 +140,9 @@ class DocsBuilder(THasRender if t.TYPE_CHECKING else object):
 
     def _download_url(self, url: str, filepath: Path) -> None:
         logger.info(f"Downloading {url}...")
-        sf = self.server.application.find_file(url)
+        if self.static_files is None:
+            self.static_files = self.get_middleware(lambda *args: [])
+        sf = self.static_files.find_file(url)
         if sf is None:
             logger.error(f"{url} doesn't exists")
             return
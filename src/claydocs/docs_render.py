@@ -1,23 +1,26 @@
 import re
 import shutil
 import textwrap
+import threading
 import typing as t
 
 import inflection
-import markdown
-from image_processing import ImageProcessing
-from pymdownx import emoji
 from jinjax.catalog import Catalog
 from slugify import slugify
 
 from . import outliner
-from .autodoc import autodoc
-from .nav import Page
-from .utils import load_markdown_metadata, logger, timestamp, widont
+from .nav import ROUTE_REDIRECT, ROUTE_SOCIAL, Page, compact_toc
+from .indexer.search_cache import SEARCH_CACHE
+from .nav_index import NAV_INDEX
+from .utils import Redirect, logger, timestamp, widont
 
 from pathlib import Path
 from .utils import THasPaths
 
+if t.TYPE_CHECKING:
+    import markdown
+    from .autodoc import Autodoc
+
 
 DEFAULT_MD_EXTENSIONS = [
     "attr_list",
@@ -55,7 +58,8 @@ DEFAULT_MD_EXT_CONFIG = {
         "disable_indented_code_blocks": True,
     },
     "pymdownx.emoji": {
-        "emoji_generator": emoji.to_alt,
+        # The name of a `pymdownx.emoji` generator or a function
+        "emoji_generator": "to_alt",
     },
 }
 
@@ -74,10 +78,10 @@ UTILS = {
 }
 DEFAULT_EXTENSIONS = [
     "jinja2.ext.loopcontrols",
+    "claydocs.fragment_cache.FragmentCacheExtension",
 ]
 
 RX_CODE = re.compile("<code[^>]*>.*?</code>", re.DOTALL)
-SOCIAL_SUFFIX = "/og-card.png"
 
 
 class DocsRender(THasPaths if t.TYPE_CHECKING else object):
@@ -97,37 +101,79 @@ class DocsRender(THasPaths if t.TYPE_CHECKING else object):
         )
         self.__init_thumbnailer__()
         self.__init_catalog__(globals, filters, tests, extensions)
+        # The server renders the pages in several threads, but the `nav`,
+        # `page` and `meta` of a page are globals of the shared catalog,
+        # that also collects the assets of the page while rendering it.
+        self._render_lock = threading.Lock()
 
     def __init_markdowner__(
         self,
         extensions: list,
         ext_config: dict[str, t.Any],
     ) -> None:
-        self.markdowner = markdown.Markdown(
-            extensions=extensions,
-            extension_configs=ext_config,
-            output_format="html",
-            tab_length=2,
-        )
+        # Loading all the extensions is slow, so the markdown renderer
+        # is created the first time is needed.
+        self._md_extensions = extensions
+        self._md_ext_config = ext_config
+        self._markdowner = None
+
+    @property
+    def markdowner(self) -> "markdown.Markdown":
+        if self._markdowner is None:
+            import markdown
+
+            ext_config = self._md_ext_config
+            generator = ext_config.get("pymdownx.emoji", {}).get("emoji_generator")
+            if isinstance(generator, str):
+                from pymdownx import emoji
+
+                ext_config = {
+                    **ext_config,
+                    "pymdownx.emoji": {
+                        **ext_config["pymdownx.emoji"],
+                        "emoji_generator": getattr(emoji, generator),
+                    },
+                }
+
+            self._markdowner = markdown.Markdown(
+                extensions=self._md_extensions,
+                extension_configs=ext_config,
+                output_format="html",
+                tab_length=2,
+            )
+        return self._markdowner
 
     def __init_thumbnailer__(self) -> None:
         this = self
+        thumbnailer_class = None
+
+        def get_thumbnailer_class():
+            # `image_processing` is imported only if a thumbnail is requested
+            from image_processing import ImageProcessing
+
+            class Thumbnailer(ImageProcessing):
+                def __init__(self, source: str) -> None:
+                    source = source.strip(" /").removeprefix(this.STATIC_URL).strip("/")
+                    super().__init__(this.static_folder / source)
 
-        class Thumbnailer(ImageProcessing):
-            def __init__(self, source: str) -> None:
-                source = source.strip(" /").removeprefix(this.STATIC_URL).strip("/")
-                super().__init__(this.static_folder / source)
+                def __str__(self) -> str:
+                    filename = self.get_temp_filename()
+                    dest = this.temp_folder / filename
+                    if not dest.is_file():
+                        self.save(dest)
+                    return f"/{this.THUMBNAILS_URL}/{filename}"
 
-            def __str__(self) -> str:
-                filename = self.get_temp_filename()
-                dest = this.temp_folder / filename
-                if not dest.is_file():
-                    self.save(dest)
-                return f"/{this.THUMBNAILS_URL}/{filename}"
+                repr = __str__
 
-            repr = __str__
+            return Thumbnailer
 
-        self.Thumbnailer = Thumbnailer
+        def thumbnailer(source: str) -> t.Any:
+            nonlocal thumbnailer_class
+            if thumbnailer_class is None:
+                thumbnailer_class = get_thumbnailer_class()
+            return thumbnailer_class(source)
+
+        self.Thumbnailer = thumbnailer
 
     def __init_catalog__(
         self,
@@ -156,7 +202,6 @@ class DocsRender(THasPaths if t.TYPE_CHECKING else object):
             tests=_tests,
             extensions=_extensions,
         )
-        catalog.jinja_env.extend(markdowner=self.markdowner)
         logger.debug("Adding folders to catalog...")
         logger.debug(f"Adding content folder: {self.content_folder}")
         catalog.add_folder(self.content_folder)
@@ -178,28 +223,36 @@ class DocsRender(THasPaths if t.TYPE_CHECKING else object):
         filepath = self.content_folder / page.filename.strip("/")
         logger.debug(f"Rendering `{filepath}`")
 
-        md_source, meta = load_markdown_metadata(filepath)
-        content = self.render_markdown(md_source)
-
+        md_source, meta = self.md_cache.load(filepath)
         meta.setdefault("title", page.title)
-        self.catalog.jinja_env.globals["nav"] = self.nav.asdict(page.lang)
-        self.catalog.jinja_env.globals["page"] = page
-        self.catalog.jinja_env.globals["meta"] = meta
-        self.catalog.jinja_env.globals["utils"]["timestamp"] = timestamp()
-        self.catalog.jinja_env.globals["autodoc"] = autodoc
+        component = meta.get("component", self.default_component)
+        with self._render_lock:
+            # The markdown renderer isn't thread-safe either
+            content = self.render_markdown(md_source)
+            env_globals = self.catalog.jinja_env.globals
+            env_globals["nav"] = self.nav.asdict(page.lang)
+            env_globals["page"] = page
+            env_globals["meta"] = meta
+            env_globals["utils"]["timestamp"] = timestamp()
+            env_globals["autodoc"] = self.autodoc
 
-        html = self.catalog.render("", __source=content)
-        html, page_toc = outliner.outline(html)
-        page.toc = page_toc
+            html = self.catalog.render("", __source=content)
+            html, page_toc = outliner.outline(html)
+            page.toc = compact_toc(page_toc)
 
-        component = meta.get("component", self.default_component)
-        # I use `catalog.irender` to not reset the assets collected in rendering
-        # the content
-        return self.catalog.irender(component, __content=html)
+            # I use `catalog.irender` to not reset the assets collected in rendering
+            # the content
+            return self.catalog.irender(component, __content=html)
+
+    def autodoc(self, name: str) -> "Autodoc":
+        from .autodoc import autodoc
+
+        return autodoc(name)
 
     def render_social_card(self, page: Page) -> str:
         component = page.meta.get("social_card", self.default_social)
-        return self.catalog.render(component, page=page)
+        with self._render_lock:
+            return self.catalog.render(component, page=page)
 
     def render_markdown(self, md_source: str) -> str:
         md_source = self.anti_escape(md_source)
@@ -236,8 +289,15 @@ class DocsRender(THasPaths if t.TYPE_CHECKING else object):
 
     def cache_pages(self) -> None:
         if self.cache:
-            shutil.rmtree(self.cache_folder, ignore_errors=True)
-            self.cache_folder.mkdir()
+            self.cache_folder.mkdir(exist_ok=True)
+            # Remove the cached pages but not the nav and search indexes
+            for path in self.cache_folder.iterdir():
+                if path.name in (NAV_INDEX, SEARCH_CACHE):
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink()
 
         for url in self.nav.pages:
             page = self.nav.get_page(url)
@@ -261,16 +321,16 @@ class DocsRender(THasPaths if t.TYPE_CHECKING else object):
         filepath.parent.mkdir(parents=True, exist_ok=True)
         return filepath
 
-    def get_cached_page(self, url: str) -> str:
-        social = url.endswith(SOCIAL_SUFFIX)
-        if social:
-            url = url.removesuffix(SOCIAL_SUFFIX)
-
-        page = self.nav.get_page(url)
-        if not page:
+    def get_cached_page(self, url: str) -> str | Redirect:
+        route = self.nav.get_route(url)
+        if not route:
             return ""
 
-        if social:
+        if route.kind == ROUTE_REDIRECT:
+            return Redirect(route.redirect)
+
+        page = route.page
+        if route.kind == ROUTE_SOCIAL:
             return self.render_social_card(page)
 
         if not page.cache_path or not page.cache_path.exists():
@@ -279,6 +339,59 @@ class DocsRender(THasPaths if t.TYPE_CHECKING else object):
             assert page.cache_path
             return page.cache_path.read_text()
 
-    def refresh(self, src_path: str) -> None:
-        if self.cache and src_path.endswith((".md", ".jinja")):
-            self.cache_pages()
+    def refresh(self, src_paths: t.Iterable[str]) -> set[str] | None:
+        """
+        Update the nav and the cached pages after a change of the files
+        of `src_paths`.
+
+        Returns the URLs of the pages that changed, or `None` if it could
+        be any of them, so the server only reloads the browsers that are
+        viewing those.
+        """
+        pages = []
+        render_all = reload_all = False
+        for src_path in src_paths:
+            if not src_path.endswith((".md", ".jinja")):
+                # A static file, nothing to render
+                reload_all = True
+                continue
+            if src_path.endswith(".md"):
+                # Changed or deleted, so no longer needed
+                self.md_cache.discard(Path(src_path).resolve())
+            page = self.update_nav(src_path) if src_path.endswith(".md") else None
+            if page:
+                pages.append(page)
+            else:
+                render_all = True
+
+        if pages or render_all:
+            self.catalog.jinja_env.fragment_cache.clear()  # type: ignore
+        if self.cache:
+            if render_all:
+                self.cache_pages()
+            else:
+                for page in pages:
+                    self.cache_page(page)
+
+        if render_all or reload_all:
+            return None
+        return {page.url for page in pages}
+
+    def update_nav(self, src_path: str) -> Page | None:
+        """
+        Returns the page of `src_path` if only its content changed, and not
+        anything that is shown in the other pages, like its title or URL.
+        """
+        path = Path(src_path).resolve()
+        if not path.is_relative_to(self.content_folder):
+            return None
+        filename = path.relative_to(self.content_folder).as_posix()
+        page = self.nav.get_file_page(filename)
+        before = (page.url, page.title, page.meta) if page else None
+        if not self.nav.update_page(filename):
+            logger.info(f"{filename} is not in the nav, restart the server to add it")
+            return None
+        if page and self.nav.get_file_page(filename) is page:
+            if (page.url, page.title, page.meta) == before:
+                return page
+        return None
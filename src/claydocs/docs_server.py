@@ -4,31 +4,56 @@ from pathlib import Path
 import jinja2
 
 from .exceptions import Abort
+from .nav import ROUTE_PAGE
 from .utils import logger, print_random_messages
-from .server import LiveReloadServer
 
 if t.TYPE_CHECKING:
+    from .server import LiveReloadServer
     from .utils import THasRender
 
 
 class DocsServer(THasRender if t.TYPE_CHECKING else object):
-    server: LiveReloadServer
+    server: "LiveReloadServer"
 
     def __init_server__(self) -> None:
+        from .server import LiveReloadServer
+
         server = LiveReloadServer(
             get_page=self.get_cached_page,
             refresh=self.refresh,
+            polling=self.watch_polling,
+            get_page_key=self.get_page_key,
         )
+        server.application = self.get_middleware(server.application)  # type: ignore
+        self.server = server
+
+    def get_page_key(self, url: str) -> str:
+        """
+        The URL of the page rendered for `url`, so the server caches and
+        reloads it once for all its accepted forms, but a `/x` and a `/x/`
+        that are different pages stay apart.
+        """
+        route = self.nav.get_route(url)
+        if route and route.kind == ROUTE_PAGE:
+            return route.page.url
+        return url
 
+    def get_middleware(self, application: t.Callable) -> t.Any:
+        """
+        Wraps the application with the middleware that serves the
+        static files, the thumbnails, and the assets of the components.
+        """
         middleware = self.catalog.get_middleware(
-            server.application,
+            application,
             allowed_ext=None,  # All file extensions allowed as static files
             autorefresh=True,
+            # Revalidated on every request, with a `304 Not Modified`
+            # response if they didn't change
+            max_age=0,
         )
         middleware.add_files(self.static_folder, self.STATIC_URL)
         middleware.add_files(self.temp_folder, self.THUMBNAILS_URL)
-        server.application = middleware  # type: ignore
-        self.server = server
+        return middleware
 
     def serve(self) -> None:
         print_random_messages()
@@ -53,3 +78,25 @@ class DocsServer(THasRender if t.TYPE_CHECKING else object):
             # Avoid ugly, unhelpful traceback
             print(f"{type(err).__name__}: {err}")
             raise Abort(f"{type(err).__name__}: {err}")
+
+    def preview(self) -> None:
+        """
+        Serve the files of the last build, as they are going to be deployed.
+        """
+        from .preview import PreviewServer
+
+        if not self.build_folder.is_dir():
+            raise Abort(f"{self.build_folder} not found, run the `build` command first")
+
+        try:
+            server = PreviewServer(self.build_folder)
+            try:
+                server.serve()
+            except KeyboardInterrupt:
+                print()  # To clear the printed ^C
+            finally:
+                server.shutdown()
+        except OSError as err:  # pragma: no cover
+            # Avoid ugly, unhelpful traceback
+            print(f"{type(err).__name__}: {err}")
+            raise Abort(f"{type(err).__name__}: {err}")
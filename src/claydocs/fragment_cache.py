@@ -0,0 +1,106 @@
+"""
+# Fragment cache
+
+A Jinja extension to cache the rendered HTML of a block of a template,
+for those large components that render the same for every page, like
+the global sidebar.
+
+Usage
+-----
+
+    {% cache "sidebar", page.section %}
+      ...
+    {% endcache %}
+
+The arguments are joined, with the name of the template and the language
+of the page, to build the cache key, so they must include everything else
+that makes the block render differently. Components rendered
+inside a cached block don't collect their CSS/JS assets when the block
+is served from the cache, so they must be also declared outside of it.
+
+The cache is a LRU shared by all the templates of the environment, and
+it is cleared by `DocsRender.refresh()`.
+
+"""
+import threading
+import typing as t
+from collections import OrderedDict
+
+from jinja2 import nodes, pass_context
+from jinja2.ext import Extension
+
+if t.TYPE_CHECKING:
+    from jinja2 import Environment
+    from jinja2.parser import Parser
+    from jinja2.runtime import Context
+
+
+FRAGMENT_CACHE_SIZE = 1000
+
+
+class FragmentCache:
+    def __init__(self, max_size: int = FRAGMENT_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> str | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: tuple, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def __init__(self, environment: "Environment") -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser: "Parser") -> nodes.Node:
+        lineno = next(parser.stream).lineno
+
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.Const(parser.name), nodes.List(args)]),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    @pass_context
+    def _render_cached(
+        self,
+        context: "Context",
+        name: str | None,
+        key: list,
+        caller: t.Callable[[], str],
+    ) -> str:
+        cache: FragmentCache = self.environment.fragment_cache  # type: ignore
+        lang = getattr(context.get("page"), "lang", "")
+        cache_key = (name, lang, *(str(part) for part in key))
+        html = cache.get(cache_key)
+        if html is None:
+            html = caller()
+            cache.set(cache_key, html)
+        return html
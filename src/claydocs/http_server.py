@@ -0,0 +1,291 @@
+import asyncio
+import io
+import socket
+import sys
+import threading
+import typing as t
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from urllib.parse import unquote_to_bytes
+
+from .utils import logger
+
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8080
+START_MESSAGE = """
+─────────────────────────────────────────────────
+ Running on {addr}
+ Press [Ctrl]+[C] to quit
+─────────────────────────────────────────────────
+"""
+
+HTTP_OK = "200 OK"
+HTTP_NOT_MODIFIED = "304 Not Modified"
+HTTP_NOT_FOUND = "404 Not Found"
+HTTP_ERROR = "500 Internal Server Error"
+BAD_REQUEST = b"HTTP/1.1 400 Bad Request\r\nConnection: close\r\n\r\n"
+# The bodies of the requests are not used, so they must have a known length
+LENGTH_REQUIRED = b"HTTP/1.1 411 Length Required\r\nConnection: close\r\n\r\n"
+
+# Maximum size of the request line and headers
+MAX_REQUEST_HEAD = 64 * 1024
+# Connections without a new request for this long, in seconds, are closed
+KEEP_ALIVE_TIMEOUT = 15
+
+
+class AsyncHTTPServer(ABC):
+    """
+    The HTTP/1.1 plumbing of the servers: all the connections are handled
+    in one asyncio event loop, running in another thread, and are kept
+    open between requests.
+
+    The subclasses write the response of each request in `_respond`.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        shutdown_delay: float = 1,
+    ) -> None:
+        self.host = host
+        self.shutdown_delay = shutdown_delay
+        self.running = False
+
+        # Bound now, like a `socketserver` does, so an address in use
+        # fails early and `port=0` gets a free port.
+        self.socket = socket.create_server((host, port))
+        self.port = self.socket.getsockname()[1]
+
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.serve_thread = threading.Thread(target=self._run_loop, daemon=True)
+        # Set by `shutdown()` to stop the event loop
+        self._stop: asyncio.Event | None = None
+
+    def start(self) -> None:
+        """Serve the requests in another thread."""
+        self.running = True
+        self.serve_thread.start()
+
+    def shutdown(self) -> None:
+        logger.info("Shutting down...")
+        self.running = False
+
+        if self.loop and self._stop:
+            self.loop.call_soon_threadsafe(self._stop.set)
+        if self.serve_thread.is_alive():
+            self.serve_thread.join(self.shutdown_delay)
+        self.socket.close()
+
+    # Private
+
+    def _run_loop(self) -> None:
+        asyncio.run(self._serve_forever())
+
+    async def _serve_forever(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if not self.running:
+            return
+
+        server = await asyncio.start_server(
+            self._handle_connection,
+            sock=self.socket,
+            limit=MAX_REQUEST_HEAD,
+        )
+        async with server:
+            await self._stop.wait()
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        remote_addr = (writer.get_extra_info("peername") or ("127.0.0.1",))[0]
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), timeout=KEEP_ALIVE_TIMEOUT
+                    )
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    return
+                environ = self._make_environ(head, remote_addr)
+                if environ is None:
+                    writer.write(BAD_REQUEST)
+                    return
+                if "HTTP_TRANSFER_ENCODING" in environ:
+                    writer.write(LENGTH_REQUIRED)
+                    return
+
+                length = get_content_length(environ)
+                if length is None:
+                    writer.write(BAD_REQUEST)
+                    return
+                # Must be read, even if not used, before the next request
+                environ["wsgi.input"] = io.BytesIO(
+                    await reader.readexactly(length) if length else b""
+                )
+                keep_alive = await self._respond(environ, reader, writer)
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # The server is shutting down
+            pass
+        finally:
+            writer.close()
+
+    def _make_environ(self, head: bytes, remote_addr: str) -> dict | None:
+        """
+        The WSGI environ of the request line and headers of `head`,
+        or `None` if they are invalid.
+        """
+        lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        try:
+            method, target, protocol = lines[0].split(" ")
+        except ValueError:
+            return None
+
+        path, _, query = target.partition("?")
+        environ = {
+            "REQUEST_METHOD": method.upper(),
+            "SCRIPT_NAME": "",
+            # Like in `wsgiref`, the bytes of the path decoded as latin-1
+            "PATH_INFO": unquote_to_bytes(path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": protocol,
+            "REMOTE_ADDR": remote_addr,
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if not sep:
+                return None
+            key = name.strip().upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = f"HTTP_{key}"
+            value = value.strip()
+            if key in environ:
+                value = f"{environ[key]},{value}"
+            environ[key] = value
+        return environ
+
+    @abstractmethod
+    async def _respond(
+        self,
+        environ: dict,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        """Write the response and returns if the connection can be reused."""
+
+
+def get_path(environ: dict) -> str:
+    """The path of the request, decoded as UTF-8."""
+    path_info = environ.get("PATH_INFO")
+    if not path_info:
+        return "/"
+    return path_info.encode("iso-8859-1", "replace").decode("utf-8", "replace")
+
+
+def get_content_length(environ: dict) -> int | None:
+    """
+    The size of the body of the request, or `None` if it is invalid.
+
+    >>> get_content_length({"CONTENT_LENGTH": "12"})
+    12
+    >>> get_content_length({})
+    0
+    >>> get_content_length({"CONTENT_LENGTH": "-1"}) is None
+    True
+    >>> get_content_length({"CONTENT_LENGTH": "12,12"}) is None
+    True
+    """
+    value = environ.get("CONTENT_LENGTH") or "0"
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+def can_keep_alive(environ: dict) -> bool:
+    """If the browser wants to reuse the connection for more requests."""
+    return (
+        environ["SERVER_PROTOCOL"] == "HTTP/1.1"
+        and environ.get("HTTP_CONNECTION", "").lower() != "close"
+    )
+
+
+def write_head(
+    writer: asyncio.StreamWriter,
+    status: str,
+    headers: t.Iterable[tuple[str, str]],
+    keep_alive: bool,
+    chunked: bool = False,
+) -> None:
+    lines = [f"HTTP/1.1 {status}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+
+def choose_encoding(accept_encoding: str, encodings: t.Sequence[str]) -> str:
+    """
+    The first of the `encodings` accepted by the browser, or "" to not
+    compress the response.
+
+    >>> choose_encoding("gzip, deflate", ("gzip",))
+    'gzip'
+    >>> choose_encoding("gzip;q=0, deflate", ("gzip",))
+    ''
+    >>> choose_encoding("gzip, br", ("br", "gzip"))
+    'br'
+    """
+    accepted = {}
+    for value in accept_encoding.lower().split(","):
+        name, _, params = value.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        accepted[name.strip()] = quality
+
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return ""
+
+
+def is_not_modified(environ: dict, etag: str, mtime: int) -> bool:
+    """
+    If the version of the page the browser has is still valid, following
+    the `If-None-Match` header or, if it's not present, `If-Modified-Since`.
+    """
+    if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in tags or "*" in tags
+
+    if_modified_since = environ.get("HTTP_IF_MODIFIED_SINCE")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return mtime <= since
+    return False
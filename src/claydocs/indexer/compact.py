@@ -0,0 +1,197 @@
+"""
+# Compact search data
+
+An alternative encoding of the `{"docs": ..., "index": ...}` data of
+`search-{lang}.json`, several times smaller:
+
+- The URL and title of the pages are stored once, in a page table, and
+  every doc references its page by position.
+- The docs are stored by column, without the fields that can be derived
+  from the page (the `parent`, the page part of the `loc`, or a title
+  that is the same as the page title).
+- Titles, URLs, anchors and tags are interned in a strings table.
+- The refs of the lunr index are the positions of the docs instead of
+  their ids, and the postings are lists instead of objects.
+
+    {
+      "format": "compact",
+      "version": 1,
+      "strings": [str, ...],
+      "pages": [[url, title], ...],
+      "docs": {
+        "id": [int | str, ...],
+        "page": [int, ...],
+        "title": [str id | null, ...],
+        "anchor": [str id | null, ...],
+        "body": [str, ...],
+        "raw": [str | null, ...]
+      },
+      "index": {
+        "version": str,
+        "fields": [str, ...],
+        "pipeline": [str, ...],
+        "terms": [[term, term index, [doc, ...] for each field], ...],
+        "vectors": [[field, doc, [term index, score, ...]], ...]
+      }
+    }
+
+`SearchData.js`, in the theme, decodes it back to the regular format.
+
+"""
+import typing as t
+
+from .text_extractor import TDoc
+
+
+COMPACT_FORMAT = "compact"
+COMPACT_VERSION = 1
+
+
+class StringTable:
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+
+def encode(docs: list[TDoc], index: dict) -> dict[str, t.Any]:
+    """
+    Encode the docs, as made by the `TextExtractor`, and their lunr.js
+    index in the compact format.
+    """
+    strings = StringTable()
+    pages: list[list[int]] = []
+    page_ids: dict[tuple[str, str], int] = {}
+    columns: dict[str, list] = {
+        "id": [],
+        "page": [],
+        "title": [],
+        "anchor": [],
+        "body": [],
+        "raw": [],
+    }
+
+    for doc in docs:
+        url, sep, anchor = doc["loc"].partition("#")
+        title = doc["title"]
+        page_title = doc.get("parent") or title
+        page_key = (url, page_title)
+        page_id = page_ids.get(page_key)
+        if page_id is None:
+            page_id = page_ids[page_key] = len(pages)
+            pages.append([strings.add(url), strings.add(page_title)])
+
+        doc_id = doc["id"]
+        columns["id"].append(int(doc_id) if _is_int(doc_id) else doc_id)
+        columns["page"].append(page_id)
+        columns["title"].append(None if title == page_title else strings.add(title))
+        columns["anchor"].append(strings.add(anchor) if sep else None)
+        columns["body"].append(doc["body"])
+        columns["raw"].append(doc.get("raw"))
+
+    return {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "strings": strings.strings,
+        "pages": pages,
+        "docs": columns,
+        "index": encode_index(index, [doc["id"] for doc in docs]),
+    }
+
+
+def encode_index(index: dict, ids: list[str]) -> dict[str, t.Any]:
+    if not index:
+        return {}
+
+    fields = index["fields"]
+    positions = {doc_id: pos for pos, doc_id in enumerate(ids)}
+    field_numbers = {field: num for num, field in enumerate(fields)}
+    terms = [
+        [
+            term,
+            posting["_index"],
+            *[[positions[ref] for ref in posting[field]] for field in fields],
+        ]
+        for term, posting in index["invertedIndex"]
+    ]
+    vectors = []
+    for field_ref, vector in index["fieldVectors"]:
+        field, ref = field_ref.split("/", 1)
+        vectors.append([field_numbers[field], positions[ref], vector])
+
+    return {
+        "version": index["version"],
+        "fields": fields,
+        "pipeline": index["pipeline"],
+        "terms": terms,
+        "vectors": vectors,
+    }
+
+
+def decode(data: dict[str, t.Any]) -> dict[str, t.Any]:
+    """
+    Decode the compact format back to `{"docs": ..., "index": ...}`.
+    """
+    strings = data["strings"]
+    pages = data["pages"]
+    columns = data["docs"]
+    docs = []
+    ids = []
+
+    for pos, doc_id in enumerate(columns["id"]):
+        url_sid, page_title_sid = pages[columns["page"][pos]]
+        url = strings[url_sid]
+        page_title = strings[page_title_sid]
+        title_sid = columns["title"][pos]
+        title = page_title if title_sid is None else strings[title_sid]
+        anchor_sid = columns["anchor"][pos]
+        raw = columns["raw"][pos]
+
+        doc = {
+            "id": str(doc_id),
+            "title": title,
+            "body": columns["body"][pos],
+            "raw": raw,
+            "parent": "" if title_sid is None else page_title,
+            "loc": url if anchor_sid is None else f"{url}#{strings[anchor_sid]}",
+        }
+        if raw is None:
+            del doc["raw"]
+        docs.append(doc)
+        ids.append(doc["id"])
+
+    return {"docs": docs, "index": decode_index(data["index"], ids)}
+
+
+def decode_index(data: dict[str, t.Any], ids: list[str]) -> dict[str, t.Any]:
+    if not data:
+        return {}
+
+    fields = data["fields"]
+    inverted_index = []
+    for term, term_index, *field_refs in data["terms"]:
+        posting: dict[str, t.Any] = {"_index": term_index}
+        for field, refs in zip(fields, field_refs):
+            posting[field] = {ids[pos]: {} for pos in refs}
+        inverted_index.append([term, posting])
+
+    return {
+        "version": data["version"],
+        "fields": fields,
+        "fieldVectors": [
+            [f"{fields[field]}/{ids[pos]}", vector]
+            for field, pos, vector in data["vectors"]
+        ],
+        "invertedIndex": inverted_index,
+        "pipeline": data["pipeline"],
+    }
+
+
+def _is_int(value: str) -> bool:
+    return value.isdecimal() and value.isascii() and (value == "0" or value[0] != "0")
@@ -1,36 +1,94 @@
 import json
 import os
 import re
+import shutil
+import subprocess
 import tempfile
 import typing as t
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
 from ..nav import Page
 from ..utils import is_debug, logger
-from .text_extractor import TDoc, extract_docs, make_doc
+from .lunr import STEMMED_LANGS, TDocTerms, analyze, build_index
+from .search_cache import SearchCache, hash_key
+from .text_extractor import (
+    TDoc,
+    extract_docs_chunk,
+    get_indexable_html,
+    make_doc,
+)
 
 
 INDEXABLE_JSON = "docs-{lang}.json"
 INDEX_JSON = "search-{lang}.json"
 INDEXER = "indexer.js"
+# Number of pages sent at once to be extracted in another process
+EXTRACT_CHUNK_SIZE = 16
+# Minimum number of changed pages to extract them in parallel
+PARALLEL_MIN_PAGES = 64
 rx_html_tags = re.compile(r"</?[a-z]+[1-6]?( open)?>")
 
 
 class Indexer:
-    def __init__(self, root: Path, render: t.Callable) -> None:
+    def __init__(
+        self,
+        root: Path,
+        render: t.Callable,
+        cache_path: Path | None = None,
+        parallel: bool = True,
+    ) -> None:
         self.root = root
         self.render = render
+        # Extracting in other processes is slower if there is only one CPU
+        self.parallel = parallel and (os.cpu_count() or 1) > 1
+        self.cache = SearchCache(cache_path)
+        # lang: [(page url, number of docs)]
+        self._page_urls: dict[str, list[tuple[str, int]]] = {}
 
     def index(self, pages: list[Page]) -> dict:
         data = {}
-        docs = self._get_docs(pages)
+        docs, terms, keys = self._get_docs(pages)
+
+        stale = {}
+        indexes = {}
+        for lang, sections in docs.items():
+            if not sections:
+                indexes[lang] = {}
+                continue
+            index = self.cache.get_index(lang, keys[lang])
+            if index is None:
+                stale[lang] = sections
+            else:
+                indexes[lang] = index
+
+        if stale:
+            logger.info(f"Indexing {', '.join(stale)} pages...")
+            langs = list(stale)
+            args = (
+                [self.root] * len(langs),
+                langs,
+                [docs[lang] for lang in langs],
+                [terms[lang] for lang in langs],
+            )
+            # Each language is indexed in its own process
+            if len(langs) > 1:
+                with ProcessPoolExecutor(max_workers=len(langs)) as executor:
+                    results = list(executor.map(index_lang, *args))
+            else:
+                results = list(map(index_lang, *args))
+
+            for lang, (index, lang_terms) in zip(langs, results):
+                indexes[lang] = index
+                self.cache.set_index(lang, keys[lang], index)
+                self._update_terms(lang, lang_terms)
+
+        self.cache.save(page.url for page in pages)
 
         for lang, sections in docs.items():
-            logger.info(f"Indexing {lang} pages...")
-            index = self._index_lang(lang, sections)
             data[lang] = {
-                "docs": self._remove_raw_data(docs[lang]),
-                "index": index
+                "docs": self._remove_raw_data(sections),
+                "index": indexes[lang],
             }
 
         return data
@@ -40,55 +98,172 @@ class Indexer:
     def _remove_raw_data(self, docs: list[TDoc]) -> list[TDoc]:
         if is_debug():
             return docs
-        for doc in docs:
-            if not doc["id"].startswith("tags-"):
-                del doc["raw"]
-        return docs
+        # The docs are also in the cache, so they are not modified
+        return [
+            doc if doc["id"].startswith("tags-")
+            else {key: value for key, value in doc.items() if key != "raw"}
+            for doc in docs
+        ]
 
-    def _get_docs(self, pages: list[Page]) -> dict[str, list[TDoc]]:
+    def _get_docs(
+        self,
+        pages: list[Page],
+    ) -> tuple[dict[str, list[TDoc]], dict[str, list], dict[str, str]]:
+        """
+        Returns the docs of every searchable page and their cached terms,
+        by language, and a key of the pages of each language.
+        Only the pages that have changed since the last run are extracted
+        again.
+        """
         logger.info("Rendering pages for indexing...")
-        docs = {}
-        for page in pages:
-            if page.meta.get("searchable") is False:
-                continue
-            docs.setdefault(page.lang, [])
-            docs[page.lang].extend(self._extract_page_data(page))
-        return docs
-
-    def _extract_page_data(self, page: Page) -> list[TDoc]:
-        html = self.render(page.url)
-        data = extract_docs(html, loc=page.url, title=page.title)
-        tags = " ".join([f"#{tag}" for tag in page.meta.get("tags", [])])
-
-        if tags:
-            data.append(make_doc(
-                id=f"tags-{page.url}",
-                title=page.title,
-                raw=tags,
-                loc=page.url,
-            ))
+        # (page, key, tags, cached docs and terms)
+        entries: list[tuple[Page, str, str, tuple | None]] = []
+        # (html, loc, title) of the changed pages
+        pending: list[tuple[str, str, str]] = []
+        futures: list[Future] = []
+        executor = None
 
-        return data
+        try:
+            for page in pages:
+                if page.meta.get("searchable") is False:
+                    continue
+
+                html = get_indexable_html(self.render(page.url))
+                tags = self._get_tags(page)
+                key = hash_key(page.url, page.title, tags, html)
+                cached = self.cache.get_page(page.url, key)
+                entries.append((page, key, tags, cached))
+                if cached is not None:
+                    continue
+
+                pending.append((html, page.url, page.title))
+                # The pages are extracted in other processes while the rest
+                # are being rendered, but only if there are enough of them
+                # to be worth it.
+                if executor is None and self.parallel and len(pending) >= PARALLEL_MIN_PAGES:
+                    executor = ProcessPoolExecutor()
+                if executor is not None:
+                    while len(pending) >= EXTRACT_CHUNK_SIZE:
+                        chunk, pending = pending[:EXTRACT_CHUNK_SIZE], pending[EXTRACT_CHUNK_SIZE:]
+                        futures.append(executor.submit(extract_docs_chunk, chunk))
+
+            if executor is not None:
+                if pending:
+                    futures.append(executor.submit(extract_docs_chunk, pending))
+                extracted = [docs for future in futures for docs in future.result()]
+            else:
+                extracted = extract_docs_chunk(pending)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        logger.debug(f"Extracted {len(extracted)} changed pages")
+        return self._collect_docs(entries, iter(extracted))
+
+    def _collect_docs(
+        self,
+        entries: list[tuple[Page, str, str, tuple | None]],
+        extracted: t.Iterator[list[TDoc]],
+    ) -> tuple[dict[str, list[TDoc]], dict[str, list], dict[str, str]]:
+        docs: dict[str, list[TDoc]] = {}
+        terms: dict[str, list] = {}
+        page_keys: dict[str, list[str]] = {}
+        last_ids: dict[str, int] = {}
+        self._page_urls = {}
 
-    def _index_lang(self, lang: str, sections: list[TDoc]) -> dict:
-        if not sections:
-            return {}
+        for page, key, tags, cached in entries:
+            if cached is None:
+                page_docs = next(extracted)
+                if tags:
+                    page_docs.append(self._make_tags_doc(page, tags))
+                page_terms = [None] * len(page_docs)
+                self.cache.set_page(page.url, key, page_docs, page_terms)
+            else:
+                page_docs, page_terms = cached
 
-        out_path = Path(tempfile.mkdtemp())
+            lang_docs = docs.setdefault(page.lang, [])
+            # The ids of the sections are unique only by page, so they are
+            # renumbered, in order, to be unique in the index.
+            for doc in page_docs:
+                if not doc["id"].startswith("tags-"):
+                    last_ids[page.lang] = last_ids.get(page.lang, 0) + 1
+                    doc = {**doc, "id": str(last_ids[page.lang])}
+                lang_docs.append(doc)
+            terms.setdefault(page.lang, []).extend(page_terms)
+            page_keys.setdefault(page.lang, []).append(key)
+            self._page_urls.setdefault(page.lang, []).append((page.url, len(page_docs)))
+
+        keys = {lang: hash_key(*lang_keys) for lang, lang_keys in page_keys.items()}
+        return docs, terms, keys
+
+    def _update_terms(self, lang: str, lang_terms: list) -> None:
+        """Store the terms of the docs of a language back in the pages cache"""
+        start = 0
+        for url, num_docs in self._page_urls.get(lang, []):
+            entry = self.cache.pages[url]
+            entry["terms"] = lang_terms[start:start + num_docs]
+            start += num_docs
+
+    def _get_tags(self, page: Page) -> str:
+        return " ".join([f"#{tag}" for tag in page.meta.get("tags", [])])
+
+    def _make_tags_doc(self, page: Page, tags: str) -> TDoc:
+        return make_doc(
+            id=f"tags-{page.url}",
+            title=page.title,
+            raw=tags,
+            loc=page.url,
+        )
+
+
+def index_lang(
+    root: Path,
+    lang: str,
+    sections: list[TDoc],
+    terms: list[TDocTerms | None] | None = None,
+) -> tuple[dict, list[TDocTerms | None]]:
+    """
+    Build the lunr.js index of the docs of a language.
+
+    Only the English stemmer is available in Python, so, for other languages,
+    the `indexer.js` script of the project is used if it exists and Node is
+    installed, to use the stemmers of `lunr-languages`. Otherwise, those
+    languages are indexed without stemming.
+
+    `terms` are the cached terms of each doc, or `None` for the ones that
+    must be analyzed. Returns the index and the terms of every doc.
+    """
+    terms = list(terms) if terms else [None] * len(sections)
+    if lang not in STEMMED_LANGS:
+        indexer_path = root / INDEXER
+        node = shutil.which("node")
+        if node and indexer_path.is_file():
+            return index_lang_with_node(node, indexer_path, lang, sections), terms
+        logger.warning(f"Indexing {lang} pages without stemming")
+
+    terms = [
+        doc_terms if doc_terms is not None else analyze(doc, lang)
+        for doc, doc_terms in zip(sections, terms)
+    ]
+    return build_index(sections, lang, terms), terms
+
+
+def index_lang_with_node(
+    node: str,
+    indexer_path: Path,
+    lang: str,
+    sections: list[TDoc],
+) -> dict:
+    with tempfile.TemporaryDirectory() as out_folder:
+        out_path = Path(out_folder)
         docs_path = out_path / INDEXABLE_JSON.format(lang=lang)
         index_path = out_path / INDEX_JSON.format(lang=lang)
         docs_path.write_text(json.dumps(sections, ensure_ascii=False))
 
-        indexer_path = self.root / INDEXER
-        if (not indexer_path.is_file()):
-            raise ValueError(f"{indexer_path} not found! Unable to activate search")
-
-        cmd = f"node {indexer_path} {lang} {out_path}"
-        print(">>>  ", cmd)
-        os.system(cmd)
-        index = json.loads(index_path.read_text())
-
-        docs_path.unlink()
-        index_path.unlink()
-        out_path.rmdir()
-        return index
+        logger.debug(f"Running {indexer_path} for {lang}")
+        subprocess.run(
+            [node, str(indexer_path), lang, str(out_path)],
+            cwd=indexer_path.parent,
+            check=True,
+        )
+        return json.loads(index_path.read_text())
@@ -0,0 +1,356 @@
+"""
+# Lunr index builder
+
+A pure-Python port of the index builder of lunr.js 2.3.9, so the search
+index can be built without Node. The result can be loaded in the browser
+with `lunr.Index.load()`.
+
+For English, the output is the same as running:
+
+    lunr(function () {
+      this.ref("id");
+      this.field("title", { boost: 10 });
+      this.field("body");
+      docs.forEach(function (doc) { this.add(doc) }, this);
+    })
+
+The stemmers of `lunr-languages` are not ported, so the other languages
+use a language-neutral pipeline: tokens are only trimmed (keeping
+non-ASCII letters) and the search pipeline is empty.
+
+"""
+import math
+import re
+import typing as t
+
+
+LUNR_VERSION = "2.3.9"
+REF = "id"
+# field name: boost
+FIELDS = {"title": 10, "body": 1}
+STEMMED_LANGS = ("en",)
+
+K1 = 1.2
+B = 0.75
+
+TIndex = dict[str, t.Any]
+# The terms of each field of a doc
+TDocTerms = list[list[str]]
+
+# The `\s` of JavaScript regular expressions, which is not the same as Python's
+rx_separator = re.compile(
+    r"[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff\-]+"
+)
+# JavaScript's `\W` is ASCII-only
+rx_trim_start = re.compile(r"^\W+", re.ASCII)
+rx_trim_end = re.compile(r"\W+$", re.ASCII)
+rx_trim_start_unicode = re.compile(r"^[\W_]+")
+rx_trim_end_unicode = re.compile(r"[\W_]+$")
+
+STOP_WORDS = frozenset((
+    "a able about across after all almost also am among an and any are as at "
+    "be because been but by can cannot could dear did do does either else ever "
+    "every for from get got had has have he her hers him his how however i if "
+    "in into is it its just least let like likely may me might most must my "
+    "neither no nor not of off often on only or other our own rather said say "
+    "says she should since so some than that the their them then there these "
+    "they this tis to too twas us wants was we were what when where which "
+    "while who whom why will with would yet you your"
+).split())
+
+
+def tokenize(value: t.Any) -> list[str]:
+    if value is None:
+        return []
+    return [token for token in rx_separator.split(str(value).lower()) if token]
+
+
+def trimmer(token: str) -> str:
+    return rx_trim_end.sub("", rx_trim_start.sub("", token))
+
+
+def unicode_trimmer(token: str) -> str:
+    return rx_trim_end_unicode.sub("", rx_trim_start_unicode.sub("", token))
+
+
+# Porter stemmer, as implemented by lunr.js
+
+STEP2_LIST = {
+    "ational": "ate",
+    "tional": "tion",
+    "enci": "ence",
+    "anci": "ance",
+    "izer": "ize",
+    "bli": "ble",
+    "alli": "al",
+    "entli": "ent",
+    "eli": "e",
+    "ousli": "ous",
+    "ization": "ize",
+    "ation": "ate",
+    "ator": "ate",
+    "alism": "al",
+    "iveness": "ive",
+    "fulness": "ful",
+    "ousness": "ous",
+    "aliti": "al",
+    "iviti": "ive",
+    "biliti": "ble",
+    "logi": "log",
+}
+
+STEP3_LIST = {
+    "icate": "ic",
+    "ative": "",
+    "alize": "al",
+    "iciti": "ic",
+    "ical": "ic",
+    "ful": "",
+    "ness": "",
+}
+
+_c = "[^aeiou]"  # consonant
+_v = "[aeiouy]"  # vowel
+_C = _c + "[^aeiouy]*"  # consonant sequence
+_V = _v + "[aeiou]*"  # vowel sequence
+
+rx_mgr0 = re.compile("^(" + _C + ")?" + _V + _C)  # [C]VC... is m>0
+rx_meq1 = re.compile("^(" + _C + ")?" + _V + _C + "(" + _V + ")?$")  # [C]VC[V] is m=1
+rx_mgr1 = re.compile("^(" + _C + ")?" + _V + _C + _V + _C)  # [C]VCVC... is m>1
+rx_s_v = re.compile("^(" + _C + ")?" + _v)  # vowel in stem
+
+rx_1a = re.compile(r"^(.+?)(ss|i)es$")
+rx2_1a = re.compile(r"^(.+?)([^s])s$")
+rx_1b = re.compile(r"^(.+?)eed$")
+rx2_1b = re.compile(r"^(.+?)(ed|ing)$")
+rx2_1b_2 = re.compile(r"(at|bl|iz)$")
+rx3_1b_2 = re.compile(r"([^aeiouylsz])\1$")
+rx4_1b_2 = re.compile("^" + _C + _v + "[^aeiouwxy]$")
+rx_1c = re.compile(r"^(.+?[^aeiou])y$")
+rx_2 = re.compile("^(.+?)(" + "|".join(STEP2_LIST) + ")$")
+rx_3 = re.compile("^(.+?)(" + "|".join(STEP3_LIST) + ")$")
+rx_4 = re.compile(
+    r"^(.+?)(al|ance|ence|er|ic|able|ible|ant|ement|ment|ent|ou|ism|ate|iti|ous|ive|ize)$"
+)
+rx2_4 = re.compile(r"^(.+?)(s|t)(ion)$")
+rx_5 = re.compile(r"^(.+?)e$")
+rx3_5 = re.compile("^" + _C + _v + "[^aeiouwxy]$")
+
+
+def stemmer(w: str) -> str:  # noqa: C901
+    if len(w) < 3:
+        return w
+
+    starts_with_y = w[0] == "y"
+    if starts_with_y:
+        w = "Y" + w[1:]
+
+    # Step 1a
+    if rx_1a.search(w):
+        w = rx_1a.sub(r"\1\2", w)
+    elif rx2_1a.search(w):
+        w = rx2_1a.sub(r"\1\2", w)
+
+    # Step 1b
+    match = rx_1b.search(w)
+    if match:
+        if rx_mgr0.search(match.group(1)):
+            w = w[:-1]
+    else:
+        match = rx2_1b.search(w)
+        if match:
+            stem = match.group(1)
+            if rx_s_v.search(stem):
+                w = stem
+                if rx2_1b_2.search(w):
+                    w = w + "e"
+                elif rx3_1b_2.search(w):
+                    w = w[:-1]
+                elif rx4_1b_2.search(w):
+                    w = w + "e"
+
+    # Step 1c
+    match = rx_1c.search(w)
+    if match:
+        w = match.group(1) + "i"
+
+    # Step 2
+    match = rx_2.search(w)
+    if match:
+        stem, suffix = match.groups()
+        if rx_mgr0.search(stem):
+            w = stem + STEP2_LIST[suffix]
+
+    # Step 3
+    match = rx_3.search(w)
+    if match:
+        stem, suffix = match.groups()
+        if rx_mgr0.search(stem):
+            w = stem + STEP3_LIST[suffix]
+
+    # Step 4
+    match = rx_4.search(w)
+    if match:
+        stem = match.group(1)
+        if rx_mgr1.search(stem):
+            w = stem
+    else:
+        match = rx2_4.search(w)
+        if match:
+            stem = match.group(1) + match.group(2)
+            if rx_mgr1.search(stem):
+                w = stem
+
+    # Step 5
+    match = rx_5.search(w)
+    if match:
+        stem = match.group(1)
+        if rx_mgr1.search(stem) or (rx_meq1.search(stem) and not rx3_5.search(stem)):
+            w = stem
+
+    if w.endswith("ll") and rx_mgr1.search(w):
+        w = w[:-1]
+
+    if starts_with_y:
+        w = "y" + w[1:]
+
+    return w
+
+
+def english_pipeline(tokens: list[str]) -> list[str]:
+    terms = []
+    for token in tokens:
+        token = trimmer(token)
+        if token in STOP_WORDS:
+            continue
+        terms.append(stemmer(token))
+    return terms
+
+
+def neutral_pipeline(tokens: list[str]) -> list[str]:
+    return [unicode_trimmer(token) for token in tokens]
+
+
+def analyze(doc: dict[str, str], lang: str = "en") -> TDocTerms:
+    """
+    Returns the terms of each field of the doc, after running them
+    through the indexing pipeline of the language.
+    """
+    pipeline = english_pipeline if lang in STEMMED_LANGS else neutral_pipeline
+    return [pipeline(tokenize(doc.get(field))) for field in FIELDS]
+
+
+def build_index(
+    docs: list[dict[str, str]],
+    lang: str = "en",
+    terms: list[TDocTerms] | None = None,
+) -> TIndex:
+    """
+    Build a lunr.js index of the docs, with the `id` as reference and the
+    `title` (with a boost of 10) and `body` fields.
+
+    The scores depend on every other doc, so the index is always built
+    from scratch, but `terms` can have the (cached) result of `analyze()`
+    for each doc, so they don't have to be tokenized again.
+
+    Returns the index in the format of `JSON.stringify(idx)`.
+    """
+    search_pipeline = ["stemmer"] if lang in STEMMED_LANGS else []
+    if terms is None:
+        terms = [analyze(doc, lang) for doc in docs]
+
+    # term: (term index, {field: {doc ref: {}}})
+    inverted_index: dict[str, tuple[int, dict[str, dict[str, dict]]]] = {}
+    # (field, doc ref): ({term: frequency}, number of terms)
+    field_frequencies: dict[tuple[str, str], tuple[dict[str, int], int]] = {}
+    doc_count = 0
+
+    for doc, doc_terms in zip(docs, terms):
+        ref = str(doc[REF])
+        doc_count += 1
+        for field, field_terms in zip(FIELDS, doc_terms):
+            frequencies: dict[str, int] = {}
+            field_frequencies[(field, ref)] = (frequencies, len(field_terms))
+
+            for term in field_terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+                posting = inverted_index.get(term)
+                if posting is None:
+                    posting = (len(inverted_index), {name: {} for name in FIELDS})
+                    inverted_index[term] = posting
+                posting[1][field].setdefault(ref, {})
+
+    total_lengths = dict.fromkeys(FIELDS, 0)
+    for (field, _), (_, length) in field_frequencies.items():
+        total_lengths[field] += length
+    num_refs = len(field_frequencies) // len(FIELDS)
+    avg_field_length = {
+        field: total / num_refs if num_refs else 0
+        for field, total in total_lengths.items()
+    }
+    idf_cache: dict[str, float] = {}
+    field_vectors = []
+
+    for (field, ref), (frequencies, field_length) in field_frequencies.items():
+        boost = FIELDS[field]
+        vector = []
+        for term, tf in frequencies.items():
+            term_index, fields_refs = inverted_index[term]
+            idf = idf_cache.get(term)
+            if idf is None:
+                idf = idf_cache[term] = _idf(fields_refs, doc_count)
+            score = idf * ((K1 + 1) * tf) / (
+                K1 * (1 - B + B * (field_length / avg_field_length[field])) + tf
+            )
+            vector.append((term_index, _round(score * boost)))
+
+        vector.sort()
+        field_vectors.append(
+            [f"{field}/{ref}", [value for pair in vector for value in pair]]
+        )
+
+    return {
+        "version": LUNR_VERSION,
+        "fields": list(FIELDS),
+        "fieldVectors": field_vectors,
+        "invertedIndex": [
+            [term, _posting_to_json(*inverted_index[term])]
+            for term in sorted(inverted_index, key=_js_sort_key)
+        ],
+        "pipeline": search_pipeline,
+    }
+
+
+def _idf(fields_refs: dict[str, dict], doc_count: int) -> float:
+    docs_with_term = sum(len(refs) for refs in fields_refs.values())
+    x = (doc_count - docs_with_term + 0.5) / (docs_with_term + 0.5)
+    return math.log(1 + abs(x))
+
+
+def _round(score: float) -> float | int:
+    # `Math.round(score * 1000) / 1000`, that rounds halves up and
+    # serializes integer values without decimals.
+    score = math.floor(score * 1000 + 0.5) / 1000
+    return int(score) if score.is_integer() else score
+
+
+def _js_sort_key(term: str) -> bytes:
+    # `Array.sort()` compares UTF-16 code units
+    return term.encode("utf-16-be", "surrogatepass")
+
+
+def _posting_to_json(term_index: int, fields_refs: dict[str, dict]) -> dict:
+    posting: dict[str, t.Any] = {"_index": term_index}
+    for field, refs in fields_refs.items():
+        posting[field] = {ref: refs[ref] for ref in sorted(refs, key=_js_key_order)}
+    return posting
+
+
+def _js_key_order(key: str) -> tuple[int, int]:
+    # JavaScript objects list integer-like keys first, in ascending order,
+    # and then the rest in insertion order (`sorted()` is stable).
+    if key.isdecimal() and key.isascii() and (key == "0" or key[0] != "0"):
+        value = int(key)
+        if value < 2**32 - 1:
+            return (0, value)
+    return (1, 0)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import typing as t
+from pathlib import Path
+
+from ..utils import logger
+from .lunr import TDocTerms
+from .text_extractor import TDoc
+
+
+SEARCH_CACHE = "search-cache.json"
+SEARCH_CACHE_VERSION = 1
+
+
+def hash_key(*parts: str) -> str:
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+class SearchCache:
+    """
+    Persisted docs extracted from each page, and their indexed terms, so
+    only the pages that have changed since the last run have to be extracted
+    again. Each entry is keyed by the URL of the page and is valid while
+    the hash of its rendered HTML doesn't change.
+
+    The last index of each language is also stored, keyed by the hashes
+    of all of its pages, so it isn't rebuilt if none of them changed.
+    """
+
+    path: Path | None
+    pages: dict[str, dict[str, t.Any]]
+    indexes: dict[str, dict[str, t.Any]]
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self.pages, self.indexes = self._load()
+
+    def get_page(self, url: str, key: str) -> tuple[list[TDoc], list] | None:
+        """
+        Returns the cached `(docs, terms)` of the page, or `None` if the
+        page is not in the cache or the key doesn't match.
+        The terms of a doc can be `None` if it wasn't analyzed.
+        """
+        entry = self.pages.get(url)
+        if not entry or entry["key"] != key:
+            return None
+        return entry["docs"], entry["terms"]
+
+    def set_page(
+        self,
+        url: str,
+        key: str,
+        docs: list[TDoc],
+        terms: list[TDocTerms | None],
+    ) -> None:
+        self.pages[url] = {"key": key, "docs": docs, "terms": terms}
+
+    def get_index(self, lang: str, key: str) -> dict | None:
+        entry = self.indexes.get(lang)
+        if not entry or entry["key"] != key:
+            return None
+        return entry["index"]
+
+    def set_index(self, lang: str, key: str, index: dict) -> None:
+        self.indexes[lang] = {"key": key, "index": index}
+
+    def save(self, urls: t.Iterable[str]) -> None:
+        """
+        Removes the entries of the pages not in `urls` and saves the
+        cache to disk.
+        """
+        urls = set(urls)
+        self.pages = {url: entry for url, entry in self.pages.items() if url in urls}
+        if not self.path:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(
+            {
+                "version": SEARCH_CACHE_VERSION,
+                "pages": self.pages,
+                "indexes": self.indexes,
+            },
+            ensure_ascii=False,
+        ))
+        os.replace(tmp_path, self.path)
+
+    # Private
+
+    def _load(self) -> tuple[dict, dict]:
+        if not self.path or not self.path.is_file():
+            return {}, {}
+        try:
+            data = json.loads(self.path.read_text())
+        except ValueError:
+            logger.debug(f"Invalid search cache {self.path}")
+            return {}, {}
+        if data.get("version") != SEARCH_CACHE_VERSION:
+            return {}, {}
+        return data.get("pages", {}), data.get("indexes", {})
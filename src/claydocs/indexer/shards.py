@@ -0,0 +1,115 @@
+"""
+# Sharded search index
+
+Instead of a single `search-{lang}.json` file, the index of a language can
+be written as a folder of shards, so the browser only has to download the
+parts of the index needed by each query:
+
+- `manifest.json`: the fields, search pipeline, and what shard has the
+  terms of each prefix.
+- `terms-{n}.json`: the terms of one or more prefixes. For each term and
+  field, the score of the term in every doc that has it.
+- `docs-{n}.json`: the docs (title, body, etc.) by id, so only the docs
+  of the displayed results have to be downloaded.
+
+lunr.js scores a doc by the similarity of the query vector with the
+vector of the doc, but that is normalized by the magnitude of the query
+only, so the components of the terms of the query are enough to build
+a partial index that returns the same results. `SearchIndex.js`, in the
+theme, is the matching client.
+
+"""
+import json
+import shutil
+import typing as t
+from pathlib import Path
+
+from .text_extractor import TDoc
+
+
+SHARDS_FOLDER = "search-{lang}"
+MANIFEST = "manifest.json"
+TERMS_SHARD = "terms-{num}.json"
+DOCS_SHARD = "docs-{num}.json"
+SHARDS_VERSION = 1
+
+TERM_PREFIX_LENGTH = 2
+# Consecutive prefixes are grouped in the same shard until it has,
+# at least, this number of terms.
+TERMS_PER_SHARD = 1000
+DOCS_PER_SHARD = 200
+# The shard of the docs with non-numeric ids, like the tags
+OTHER_DOCS_SHARD = "other"
+
+
+def get_term_prefix(term: str) -> str:
+    return term[:TERM_PREFIX_LENGTH]
+
+
+def get_docs_shard(doc_id: str) -> str:
+    if doc_id.isdecimal() and doc_id.isascii():
+        return str((int(doc_id) - 1) // DOCS_PER_SHARD)
+    return OTHER_DOCS_SHARD
+
+
+def make_shards(docs: list[TDoc], index: dict) -> dict[str, t.Any]:
+    """
+    Split a lunr.js index, and its docs, into shards.
+    Returns a dict of filenames and their content.
+    """
+    fields = index.get("fields", [])
+    terms: dict[str, dict[str, dict[str, float]]] = {}
+    by_index: dict[int, dict[str, dict[str, float]]] = {}
+    for term, posting in index.get("invertedIndex", []):
+        scores = {field: {} for field in fields}
+        terms[term] = scores
+        by_index[posting["_index"]] = scores
+
+    for field_ref, vector in index.get("fieldVectors", []):
+        field, ref = field_ref.split("/", 1)
+        for term_index, score in zip(vector[::2], vector[1::2]):
+            by_index[term_index][field][ref] = score
+
+    files: dict[str, t.Any] = {}
+    prefixes: dict[str, int] = {}
+    shard: list[list] = []
+    # The terms of the inverted index are sorted, so all the terms
+    # of a prefix are together.
+    for term, scores in terms.items():
+        prefix = get_term_prefix(term)
+        if prefix not in prefixes:
+            if len(shard) >= TERMS_PER_SHARD:
+                files[TERMS_SHARD.format(num=len(files))] = {"terms": shard}
+                shard = []
+            prefixes[prefix] = len(files)
+        shard.append([term, {field: refs for field, refs in scores.items() if refs}])
+    if shard:
+        files[TERMS_SHARD.format(num=len(files))] = {"terms": shard}
+
+    docs_shards: dict[str, dict[str, TDoc]] = {}
+    for doc in docs:
+        docs_shards.setdefault(get_docs_shard(doc["id"]), {})[doc["id"]] = doc
+    for num, shard_docs in docs_shards.items():
+        files[DOCS_SHARD.format(num=num)] = {"docs": shard_docs}
+
+    files[MANIFEST] = {
+        "version": SHARDS_VERSION,
+        "fields": fields,
+        "pipeline": index.get("pipeline", []),
+        "prefix_length": TERM_PREFIX_LENGTH,
+        "prefixes": prefixes,
+        "docs_per_shard": DOCS_PER_SHARD,
+    }
+    return files
+
+
+def write_shards(folder: Path, docs: list[TDoc], index: dict) -> None:
+    """
+    Write the shards of the index to `folder`, replacing the previous ones.
+    """
+    shutil.rmtree(folder, ignore_errors=True)
+    folder.mkdir(parents=True)
+    for filename, data in make_shards(docs, index).items():
+        (folder / filename).write_text(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        )
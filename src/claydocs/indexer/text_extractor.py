@@ -9,14 +9,13 @@ START_PAGE = "startpage"
 END_PAGE = "endpage"
 
 # Ignore these tags but save its content
-IGNORE_TAGS = (
+IGNORE_TAGS = frozenset((
     "a",
     "address",
     "article",
     "aside",
     "div",
     "fieldset",
-    "figcaption>",
     "footer",
     "header",
     "hgroup",
@@ -28,10 +27,10 @@ IGNORE_TAGS = (
     "summary",
     "tbody",
     "thead",
-)
+))
 
 # Ignore these tags and its content
-IGNORE_TAG_AND_CONTENTS = (
+IGNORE_TAG_AND_CONTENTS = frozenset((
     "button",
     "dialog",
     "form",
@@ -45,15 +44,15 @@ IGNORE_TAG_AND_CONTENTS = (
     "template",
     "textarea",
     "video",
-)
+))
 
-TO_DIV_TAGS = ("details",)
+TO_DIV_TAGS = frozenset(("details",))
 
-HEADER_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+HEADER_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
 PRE_TAG = "pre"
 CODE_TAG = "code"
 
-CUT_ON = (
+CUT_ON = frozenset((
     "address",
     "article",
     "aside",
@@ -70,14 +69,32 @@ CUT_ON = (
     "section",
     "table",
     "ul",
-)
+))
 ID_ATTR = "id"
 
 rx_multiple_spaces = re.compile(r"\s+")
+# Same result than `rx_multiple_spaces.sub(" ", text)`, but faster because
+# it doesn't replace the single spaces, by far the most common match.
+rx_spaces_to_collapse = re.compile(r"[^\S ]\s*| \s+")
 rx_non_text = re.compile(
     r"[^\w./_\-]|\s[._-]+|[._-]+\s|[._-]+$|^[._-]+|\s/\s", re.UNICODE | re.IGNORECASE
 )
 
+# The text chunks of a section are normalized together, joined with this
+# separator, so the regular expressions run once per section instead of
+# once per chunk.
+CHUNK_SEP = "\x00"
+# A version of `rx_non_text` that treats the separator like the start/end of
+# the string, so the result is the same as normalizing each chunk by itself.
+# It leaves out the alternatives that never match, because their first
+# character is always matched by the first one, and replaces a run of
+# non-text characters with a single space, because the spaces are
+# collapsed later anyway.
+rx_non_text_chunks = re.compile(
+    r"[^\w./_\-\x00]+|[._-]+(?:\s|(?=\x00|\Z))|(?<![^\x00])[._-]+",
+    re.UNICODE | re.IGNORECASE,
+)
+
 
 def make_doc(
     *,
@@ -114,6 +131,9 @@ class TextExtractor(HTMLParser):
     _title: list[str]
     _body: list[str]
     _raw: list[str]
+    # Where the chunks that are not yet normalized start in `_body` and `_raw`
+    _body_start: int
+    _raw_start: int
     _id: int
 
     def __init__(self, page_title: str = "", base_loc: str = ""):
@@ -125,6 +145,8 @@ class TextExtractor(HTMLParser):
         self._title = []
         self._body = []
         self._raw = []
+        self._body_start = 0
+        self._raw_start = 0
         self._id = 1
 
     def handle_starttag(self, tag: str, attrs: list):
@@ -154,14 +176,12 @@ class TextExtractor(HTMLParser):
 
         if tag == PRE_TAG:
             self._in_pre = True
-
-        if tag == CODE_TAG:
+        elif tag == CODE_TAG:
             self._in_code = True
-
-        if tag in TO_DIV_TAGS:
+        elif tag in TO_DIV_TAGS:
             tag = "div"
 
-        self._body.append(f"<{tag}>")
+        self._append_tag(tag, f"<{tag}>")
 
     def handle_endtag(self, tag: str):
         if not (self._in_page and self._capture):
@@ -180,14 +200,12 @@ class TextExtractor(HTMLParser):
 
         if tag == PRE_TAG:
             self._in_pre = False
-
-        if tag == CODE_TAG:
+        elif tag == CODE_TAG:
             self._in_code = False
-
-        if tag in TO_DIV_TAGS:
+        elif tag in TO_DIV_TAGS:
             tag = "div"
 
-        self._body.append(f"</{tag}>")
+        self._append_tag(tag, f"</{tag}>")
 
     def handle_comment(self, data: str):
         if data == START_PAGE:
@@ -199,21 +217,38 @@ class TextExtractor(HTMLParser):
         if not (self._in_page and self._capture):
             return
 
-        text_data = data
-        data = html.escape(text_data)
-
         if self._in_header:
             self._title.append(data)
             return
 
-        if not self._in_pre:
-            data = rx_multiple_spaces.sub(" ", data)
+        escaped = html.escape(data)
+        if CHUNK_SEP in data:
+            # Can't be joined with the rest, so normalize it now
+            self._flush_body()
+            self._flush_raw()
+            if not self._in_pre:
+                escaped = rx_spaces_to_collapse.sub(" ", escaped)
+            if not self._in_code:
+                data = rx_non_text.sub(" ", data)
+            self._body.append(escaped)
+            self._raw.append(data)
+            self._body_start = len(self._body)
+            self._raw_start = len(self._raw)
+            return
 
-        if not self._in_code:
-            text_data = rx_non_text.sub(" ", text_data)
+        if self._in_pre:
+            self._flush_body()
+            self._body.append(escaped)
+            self._body_start = len(self._body)
+        else:
+            self._body.append(escaped)
 
-        self._raw.append(text_data)
-        self._body.append(data)
+        if self._in_code:
+            self._flush_raw()
+            self._raw.append(data)
+            self._raw_start = len(self._raw)
+        else:
+            self._raw.append(data)
 
     def handle_entityref(self, name):
         self.handle_data(f"&{name};")
@@ -222,13 +257,16 @@ class TextExtractor(HTMLParser):
         self.handle_data(f"&#{name};")
 
     def save_section(self):
+        self._flush_raw()
         raw = "".join(self._raw).strip()
-        raw = rx_multiple_spaces.sub(" ", raw)
+        raw = rx_spaces_to_collapse.sub(" ", raw)
         if not raw:
             return
 
-        title = "".join(self._title).strip()
-        title = rx_multiple_spaces.sub(" ", title)
+        # The title is escaped all at once instead of by chunk
+        title = html.escape("".join(self._title)).strip()
+        title = rx_spaces_to_collapse.sub(" ", title)
+        self._flush_body()
         body = "".join(self._body).strip()
 
         if not title or title == self._page_title:
@@ -239,6 +277,8 @@ class TextExtractor(HTMLParser):
 
         self._body = []
         self._raw = []
+        self._body_start = 0
+        self._raw_start = 0
 
         if title == body:
             return
@@ -260,9 +300,68 @@ class TextExtractor(HTMLParser):
         self.save_section()
         super().close()
 
+    # Private
+
+    def _append_tag(self, tag: str, markup: str) -> None:
+        # The tags are between the pending text chunks of the body, so they
+        # must not have any whitespace to collapse. Only a malformed one could.
+        if not tag.isalnum() and rx_multiple_spaces.search(tag):
+            self._flush_body()
+            self._body.append(markup)
+            self._body_start = len(self._body)
+        else:
+            self._body.append(markup)
+
+    def _flush_body(self) -> None:
+        """
+        Collapse the whitespace of the pending text chunks of the body.
+        """
+        start = self._body_start
+        if start < len(self._body) - 1:
+            text = CHUNK_SEP.join(self._body[start:])
+            text = rx_spaces_to_collapse.sub(" ", text).replace(CHUNK_SEP, "")
+            self._body[start:] = [text]
+        elif start < len(self._body):
+            self._body[start] = rx_spaces_to_collapse.sub(" ", self._body[start])
+        self._body_start = len(self._body)
+
+    def _flush_raw(self) -> None:
+        """
+        Remove the punctuation of the pending text chunks.
+        """
+        start = self._raw_start
+        if start < len(self._raw):
+            text = CHUNK_SEP.join(self._raw[start:])
+            text = rx_non_text_chunks.sub(" ", text).replace(CHUNK_SEP, "")
+            self._raw[start:] = [text]
+        self._raw_start = len(self._raw)
+
+
+def get_indexable_html(html: str) -> str:
+    """
+    Returns the part of the HTML that is read by the `TextExtractor`:
+    from the first `<!--startpage-->` comment to the last `<!--endpage-->`,
+    without the rest of the layout, that could change on every render.
+    """
+    start = html.find(f"<!--{START_PAGE}-->")
+    if start == -1:
+        return ""
+    end = html.rfind(f"<!--{END_PAGE}-->")
+    if end < start:
+        return html[start:]
+    return html[start:end]
+
 
 def extract_docs(html: str, loc: str, title: str) -> list[TDoc]:
     parser = TextExtractor(page_title=title, base_loc=loc)
     parser.feed(html)
     parser.close()
     return parser.docs
+
+
+def extract_docs_chunk(chunk: list[tuple[str, str, str]]) -> list[list[TDoc]]:
+    """
+    Extract the docs of a list of `(html, loc, title)` of several pages,
+    so they can be sent together to another process.
+    """
+    return [extract_docs(html, loc=loc, title=title) for html, loc, title in chunk]
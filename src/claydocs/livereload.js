@@ -1,4 +1,30 @@
 (function () {
+  var EVENTS_URL = "/livereload/events";
+  // Only the pages that changed are reloaded
+  var PAGE_PARAM = "?page=" + encodeURIComponent(location.pathname);
+
+  // The server pushes every new epoch. The browser reconnects by itself
+  // if the connection is lost, and the server starts with the current one.
+  function listen (epoch) {
+    var source = new EventSource(EVENTS_URL + PAGE_PARAM);
+
+    source.onmessage = function (event) {
+      if (parseFloat(event.data) > epoch) {
+        source.close();
+        location.reload();
+      }
+    };
+    source.onerror = function () {
+      // Closed for good, for example by a proxy that doesn't support it
+      if (source.readyState === EventSource.CLOSED) {
+        livereload(epoch);
+      }
+    };
+
+    console.log('Enabled live reload');
+  }
+
+  // Long polling fallback
   function livereload (epoch) {
     var errorCount = 0;
     var req = new XMLHttpRequest();
@@ -17,11 +43,15 @@
         setTimeout(launchNext, 2000);
       }
     };
-    req.open("GET", "/livereload/" + epoch);
+    req.open("GET", "/livereload/" + epoch + PAGE_PARAM);
     req.send();
 
     console.log('Enabled live reload');
   }
 
-  livereload(__EPOCH__);
+  if (window.EventSource) {
+    listen(__EPOCH__);
+  } else {
+    livereload(__EPOCH__);
+  }
 })()
@@ -1,26 +1,35 @@
+import fnmatch
 import json
 import os
 import re
 import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 
 from slugify import slugify
 
 from .exceptions import InvalidNav
-from .utils import load_markdown_metadata, logger
+from .nav_index import NavIndex, TPageHeader
+from .utils import is_debug, logger
 
 
 TPagesBranch = t.Sequence[str | tuple[str, "TPagesBranch"]]
 TPagesMultiLang = dict[str, TPagesBranch]
 TPages = TPagesBranch | TPagesMultiLang
 TStrOrPath = str | Path
+TBreadcrumbs = tuple[tuple[str | None, str], ...]
 
 DEFAULT_LANG = "en"
-rx_markdwown_h1 = re.compile(r"(^|\n)#\s+(?P<h1>[^\n]+)(\n|$)")
-rx_html_h1 = re.compile(r"<h1>(?P<h1>.+)</h1>", re.IGNORECASE)
 
-SOCIAL_SUFFIX = "/__social"
+SOCIAL_SUFFIX = "/og-card.png"
+INDEX_SUFFIX = "/index"
+RX_INDEX_SUFFIX = re.compile(r"/index/?$", re.IGNORECASE)
+
+ROUTE_PAGE = "page"
+ROUTE_SOCIAL = "social"
+ROUTE_REDIRECT = "redirect"
 
 
 @dataclass
@@ -30,26 +39,159 @@ class Language:
     name: str = ""
 
 
+@dataclass
+class NavEntry:
+    """Where a file of the nav is placed in the table of contents."""
+    lang: str
+    item: str
+    section: list
+    toc_item: list
+    # All the items of the section, as declared, to be able to restore
+    # the page in its place if it is removed and then added back.
+    siblings: list
+
+
+class TocItem(t.NamedTuple):
+    """An entry of the table of contents of a page."""
+    url: str
+    title: str
+    children: tuple["TocItem", ...] = ()
+
+
+class Route(t.NamedTuple):
+    page: "Page"
+    # ROUTE_PAGE, ROUTE_SOCIAL or ROUTE_REDIRECT
+    kind: str
+    redirect: str = ""
+
+
 class Page:
-    lang: str = ""
-    url: str = ""
-    base_url: str = ""
-    filename: str = ""
-    title: str = ""
-    index: int = 0
-    section: str = ""
-    description: str = ""
-    cache_path: Path | None = None
+    __slots__ = (
+        "lang",
+        "url",
+        "base_url",
+        "filename",
+        "title",
+        "index",
+        "section",
+        "description",
+        "cache_path",
+        "prev_page",
+        "next_page",
+        "meta",
+        "toc",
+    )
+
+    lang: str
+    url: str
+    base_url: str
+    filename: str
+    title: str
+    index: int
+    section: str
+    description: str
+    cache_path: Path | None
     prev_page: "Page"
     next_page: "Page"
     meta: dict
-    toc: list
+    toc: tuple[TocItem, ...]
+
+    def __init__(
+        self,
+        *,
+        lang: str = "",
+        url: str = "",
+        base_url: str = "",
+        filename: str = "",
+        title: str = "",
+        index: int = 0,
+        section: str = "",
+        description: str = "",
+        cache_path: Path | None = None,
+        prev_page: "Page | None" = None,
+        next_page: "Page | None" = None,
+        meta: dict | None = None,
+        toc: tuple[TocItem, ...] = (),
+    ) -> None:
+        self.lang = lang
+        self.url = url
+        self.base_url = base_url
+        self.filename = filename
+        self.title = title
+        self.index = index
+        self.section = section
+        self.description = description
+        self.cache_path = cache_path
+        self.prev_page = prev_page or NULL_PAGE
+        self.next_page = next_page or NULL_PAGE
+        self.meta = {} if meta is None else meta
+        self.toc = toc
+
+    def __repr__(self) -> str:
+        return f"<Page {self.url!r}>"
+
+
+class NullPage(Page):
+    """
+    An empty page, used as the `prev_page` of the first page and the
+    `next_page` of the last one.
+    There is only one instance, `NULL_PAGE`, and it can't be modified.
+    """
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        values = {
+            "lang": "",
+            "url": "",
+            "base_url": "",
+            "filename": "",
+            "title": "",
+            "index": 0,
+            "section": "",
+            "description": "",
+            "cache_path": None,
+            "prev_page": self,
+            "next_page": self,
+            "meta": MappingProxyType({}),
+            "toc": (),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: t.Any) -> None:
+        raise AttributeError("The null page can't be modified")
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "<NullPage>"
+
 
-    def __init__(self, **kwargs):
-        kwargs.setdefault("meta", {})
-        kwargs.setdefault("toc", [])
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+NULL_PAGE = NullPage()
+
+
+def compact_toc(page_toc: list[dict]) -> tuple[TocItem, ...]:
+    """
+    Converts the table of contents generated by `outliner.outline()`
+    to nested, read-only, `(url, title, children)` tuples.
+
+    >>> compact_toc([
+    ...     {"level": 1, "id": "s-1", "name": "One", "children": [
+    ...         {"level": 2, "id": "s-11", "name": "One.One", "children": []},
+    ...     ]},
+    ... ])
+    (TocItem(url='#s-1', title='One', children=(TocItem(url='#s-11', title='One.One', children=()),)),)
+    """
+    return tuple(
+        TocItem(
+            url=f"#{item['id']}",
+            title=item["name"],
+            children=compact_toc(item["children"]),
+        )
+        for item in page_toc
+    )
 
 
 class Nav:
@@ -61,9 +203,16 @@ class Nav:
     pages: dict[str, Page]
     toc: dict[str, list]
     urls: dict[str, list[str]]
+    routes: dict[str, Route]
 
     _max_index: dict[str, int]
     _content_folder: Path
+    _nav_index: NavIndex
+    _headers: dict[str, TPageHeader]
+    _entries: dict[str, NavEntry]
+    _files: dict[str, Page]
+    _removed: dict[str, Page]
+    _views: dict[str, t.Mapping[str, t.Any]]
 
     def __init__(
         self,
@@ -74,14 +223,21 @@ class Nav:
         base_url: str = "",
         languages: dict[str, str] | None = None,
         default: str = DEFAULT_LANG,
+        index_path: Path | None = None,
     ) -> None:
         self.pages = {}
+        self.routes = {}
         self.languages = {}
         self.toc = {}
         self.urls = {}
         self._max_index = {}
+        self._entries = {}
+        self._files = {}
+        self._removed = {}
+        self._views = {}
 
         self._content_folder = Path(content_folder)
+        self._nav_index = NavIndex(index_path)
         base_url = base_url.strip() or "/"
         if base_url != "/":
             base_url = f"/{base_url.strip('/')}/"
@@ -90,28 +246,135 @@ class Nav:
         self.default = default
 
         if isinstance(pages, dict):
-            self._init_multi_language(pages, languages or {})
+            languages = languages or {}
+            filenames = []
+            for lang in languages:
+                filenames.extend(self._get_filenames(pages[lang], root=lang))
+        else:
+            filenames = self._get_filenames(pages, root="")
+        self._headers = self._nav_index.get_headers(self._content_folder, filenames)
+
+        if isinstance(pages, dict):
+            self._init_multi_language(pages, languages)
         else:
             self._init_single_language(pages, default)
+        self._headers = {}
+
+        siblings = {}
+        for entry in self._entries.values():
+            entry.siblings = siblings.setdefault(id(entry.section), entry.section[:])
 
         for page in self.pages.values():
             page.prev_page = self._get_prev(page)
             page.next_page = self._get_next(page)
+            self._add_routes(page)
+
+        for lang in self.toc:
+            self._views[lang] = self._build_view(lang)
 
         self._log_initial_status()
 
     def get_page(self, url: str) -> Page | None:
-        return self.pages.get(url) or self.pages.get(f"{url}/") or None
+        route = self.routes.get(url)
+        if route and route.kind == ROUTE_PAGE:
+            return route.page
+        return None
 
-    def asdict(self, lang: str) -> dict:
-        return {
-            "domain": self.domain,
-            "languages": self.languages,
-            "default": self.default,
-            "pages": self.pages,
-            "toc": self.toc[lang],
-            "urls": self.urls[lang],
-        }
+    def get_route(self, url: str) -> Route | None:
+        """
+        Returns what to do with a requested URL:
+
+        - `ROUTE_PAGE`: render the page.
+        - `ROUTE_SOCIAL`: render the social card of the page.
+        - `ROUTE_REDIRECT`: redirect to `route.redirect`.
+
+        or `None` if the URL is not of any page.
+        """
+        route = self.routes.get(url)
+        if route is None:
+            # `/index` in another case, like `/Index` or `/INDEX/`
+            match = RX_INDEX_SUFFIX.search(url)
+            if match:
+                page = self.get_page(f"{url[:match.start()]}/")
+                if page:
+                    return Route(page, ROUTE_REDIRECT, page.url)
+        return route
+
+    def get_file_page(self, filename: str) -> Page | None:
+        """
+        Returns the page of a file of the content folder, relative to it,
+        or `None` if it's not in the navigation.
+        """
+        return self._files.get(filename)
+
+    def asdict(self, lang: str) -> t.Mapping[str, t.Any]:
+        """
+        Returns the read-only, precomputed, navigation data of a language
+        used by the templates. See `_build_view`.
+        """
+        return self._views[lang]
+
+    def update_page(self, filename: str) -> bool:
+        """
+        Apply the change of a single file of the content folder, without
+        rebuilding the whole navigation: its title, slug and metadata are
+        read again and, if it was deleted, it is removed from the navigation
+        (and restored to its place if it is created again).
+
+        The `filename` is relative to the content folder.
+
+        Returns `False` if the file is not part of the navigation.
+        """
+        entry = self._entries.get(filename)
+        if not entry:
+            return False
+
+        if not (self._content_folder / filename).is_file():
+            if filename in self._files:
+                logger.debug(f"Removing {filename} from the nav")
+                self._remove_page(filename)
+                self._views[entry.lang] = self._build_view(entry.lang)
+            return True
+
+        title, meta = self._nav_index.update(self._content_folder, filename)
+        title = title or Path(entry.item).name
+        slug = meta.get("slug") or entry.item
+
+        page = self._files.get(filename) or self._removed[filename]
+        url = f"{page.base_url}{self._get_url(slug)}"
+        other = self.pages.get(url)
+        if other and other is not page:
+            # The same as `_index_page` does, but a running server can't stop
+            logger.warning(
+                f"{filename} has the same URL, `{url}`, as {other.filename}. "
+                "Its change is ignored"
+            )
+            return True
+
+        if filename in self._files:
+            logger.debug(f"Updating {filename} in the nav")
+            if url != page.url:
+                self._remove_routes(page)
+                del self.pages[page.url]
+                self.pages[url] = page
+                self.urls[page.lang][page.index] = url
+                page.url = url
+                self._add_routes(page)
+        else:
+            logger.debug(f"Restoring {filename} to the nav")
+            del self._removed[filename]
+            page.url = url
+            self._insert_page(page, entry)
+            self._add_routes(page)
+
+        page.title = title
+        page.description = meta.get("description", "")
+        page.meta = meta
+        entry.toc_item[0] = url
+        entry.toc_item[1] = title
+
+        self._views[entry.lang] = self._build_view(entry.lang)
+        return True
 
     # Private
 
@@ -314,19 +577,20 @@ class Nav:
         section_title: str,
         section: list,
     ) -> None:
-        filepath = self._content_folder / root / item
-        source, meta = load_markdown_metadata(filepath)
-        title = (
-            meta.pop("title", None) or self._extract_page_title(source) or filepath.name
-        )
+        filename = f"{root}/{item}".strip("/")
+        title, meta = self._headers[filename]
+        title = title or Path(item).name
         slug = meta.get("slug") or item
         url = f"{base_url}{self._get_url(slug)}"
+        other = self.pages.get(url)
+        if other:
+            raise InvalidNav(f"{filename} has the same URL, `{url}`, as {other.filename}")
 
         index = len(self.urls[lang])
         self.pages[url] = Page(
             lang=lang,
             url=url,
-            filename=f"{root}/{item}".strip("/"),
+            filename=filename,
             title=title,
             index=index,
             section=section_title,
@@ -335,7 +599,17 @@ class Nav:
             base_url=base_url
         )
         self.urls[lang].append(url)
-        section.append([url, title, None])
+        toc_item = [url, title, None]
+        section.append(toc_item)
+
+        self._files[filename] = self.pages[url]
+        self._entries[filename] = NavEntry(
+            lang=lang,
+            item=item,
+            section=section,
+            toc_item=toc_item,
+            siblings=[],
+        )
 
     def _index_section(
         self,
@@ -360,21 +634,192 @@ class Nav:
             section=new_section[-1],
         )
 
-    def _extract_page_title(self, source: str) -> str:
-        match = rx_markdwown_h1.search(source)
-        if match:
-            return match.group("h1")
+    def _build_view(self, lang: str) -> t.Mapping[str, t.Any]:
+        """
+        Precompute the navigation structures of a language, so the templates
+        can do lookups instead of walking the whole table of contents
+        on every page.
+
+        Besides the `lang`, `base_url`, `domain`, `languages`, `default`,
+        `pages`, `toc` and `urls` of the language, it includes:
+
+        - `flat_toc`: a tuple of `(url, title, level)` items, in order.
+            Sections have `None` as url.
+        - `ancestors`: page url -> tuple of the titles of the sections
+            that contain it, outermost first.
+        - `breadcrumbs`: page url -> tuple of `(url, title)` pairs
+            of its sections and the page itself. The url of a section is the one
+            of its first page (or `None` if it has none).
+        - `sections`: position of the section in `flat_toc` -> `(start, stop)`
+            range of the indexes of the pages inside it, including those of
+            its subsections. Sections can share a title, so they are not
+            keyed by it.
+
+        All the containers are read-only: the mappings are proxies and
+        the sequences are tuples. The pages themselves are not copied.
+        """
+        flat_toc: list[tuple[str | None, str, int]] = []
+        ancestors: dict[str, tuple[str, ...]] = {}
+        breadcrumbs: dict[str, TBreadcrumbs] = {}
+        sections: dict[int, tuple[int, int]] = {}
+
+        def get_first_url(items: list) -> str | None:
+            for url, _, children in items:
+                url = url if children is None else get_first_url(children)
+                if url:
+                    return url
+            return None
+
+        def walk(items: list, level: int, parents: TBreadcrumbs) -> None:
+            for url, title, children in items:
+                if children is None:
+                    flat_toc.append((url, title, level))
+                    ancestors[url] = tuple(title for _, title in parents)
+                    breadcrumbs[url] = (*parents, (url, title))
+                    continue
+
+                position = len(flat_toc)
+                flat_toc.append((None, title, level))
+                # The pages are indexed in the same order they are walked
+                start = len(ancestors)
+                walk(children, level + 1, (*parents, (get_first_url(children), title)))
+                if len(ancestors) > start:
+                    sections[position] = (start, len(ancestors))
+
+        def freeze_toc(items: list) -> tuple:
+            return tuple(
+                (url, title, None if children is None else freeze_toc(children))
+                for url, title, children in items
+            )
 
-        match = rx_html_h1.search(source)
-        if match:
-            return match.group("h1")
+        walk(self.toc[lang], 0, ())
+        language = self.languages.get(lang)
+        return MappingProxyType({
+            "lang": lang,
+            "base_url": language.url if language else self.base_url,
+            "domain": self.domain,
+            "languages": MappingProxyType(self.languages),
+            "default": self.default,
+            "pages": MappingProxyType(self.pages),
+            "toc": freeze_toc(self.toc[lang]),
+            "urls": tuple(self.urls[lang]),
+            "flat_toc": tuple(flat_toc),
+            "ancestors": MappingProxyType(ancestors),
+            "breadcrumbs": MappingProxyType(breadcrumbs),
+            "sections": MappingProxyType(sections),
+        })
+
+    def _get_filenames(self, pages: TPagesBranch, *, root: str) -> list[str]:
+        """
+        Recursively list the filenames, relative to the content folder,
+        of the pages.
+        """
+        filenames = []
+        for item in pages:
+            if isinstance(item, str):
+                filenames.append(f"{root}/{item}".strip("/"))
+            elif isinstance(item, (tuple, list)) and len(item) == 2:
+                filenames.extend(self._get_filenames(item[1], root=root))
+        return filenames
+
+    def _remove_page(self, filename: str) -> None:
+        page = self._files.pop(filename)
+        self._removed[filename] = page
+        entry = self._entries[filename]
+        lang = page.lang
+        urls = self.urls[lang]
+
+        entry.section[:] = [item for item in entry.section if item is not entry.toc_item]
+        self._remove_routes(page)
+        del self.pages[page.url]
+        del urls[page.index]
+        for url in urls[page.index:]:
+            self.pages[url].index -= 1
+        self._max_index[lang] -= 1
 
-        return ""
+        self._relink(page.prev_page)
+        self._relink(page.next_page)
+
+    def _insert_page(self, page: Page, entry: NavEntry) -> None:
+        lang = page.lang
+        urls = self.urls[lang]
+
+        index = 0
+        for filename, other in self._entries.items():
+            if other is entry:
+                break
+            if other.lang == lang and filename in self._files:
+                index += 1
+
+        page.index = index
+        urls.insert(index, page.url)
+        for url in urls[index + 1:]:
+            self.pages[url].index += 1
+        self.pages[page.url] = page
+        self._files[page.filename] = page
+        self._max_index[lang] += 1
+
+        entry.section[:] = [
+            item for item in entry.siblings
+            if item is entry.toc_item or any(item is other for other in entry.section)
+        ]
+
+        self._relink(page)
+        self._relink(page.prev_page)
+        self._relink(page.next_page)
+
+    def _get_routes(self, page: Page) -> dict[str, Route]:
+        """
+        All the accepted forms of the URL of a page: with and without
+        the trailing slash, ending in `/index` (redirected to the page URL),
+        and with the social card suffix.
+        """
+        base = page.url.rstrip("/")
+        return {
+            base: Route(page, ROUTE_PAGE),
+            f"{base}/": Route(page, ROUTE_PAGE),
+            f"{base}{INDEX_SUFFIX}": Route(page, ROUTE_REDIRECT, page.url),
+            f"{base}{INDEX_SUFFIX}/": Route(page, ROUTE_REDIRECT, page.url),
+            f"{base}{SOCIAL_SUFFIX}": Route(page, ROUTE_SOCIAL),
+        }
+
+    def _add_routes(self, page: Page) -> None:
+        base = page.url.rstrip("/")
+        index_urls = (f"{base}{INDEX_SUFFIX}", f"{base}{INDEX_SUFFIX}/")
+        for url, route in self._get_routes(page).items():
+            current = self.routes.get(url)
+            if current and current.page is not page:
+                # If both "/x" and "/x/" are pages, each one keeps its exact URL,
+                # and "/x/index" is of "/x/", like the file `x/index.md`
+                if current.page.url == url:
+                    continue
+                if url in index_urls and current.page.url == f"{base}/":
+                    continue
+            self.routes[url] = route
+
+    def _remove_routes(self, page: Page) -> None:
+        for url in self._get_routes(page):
+            route = self.routes.get(url)
+            if route and route.page is page:
+                del self.routes[url]
+
+        # Give back the routes the page was sharing with its twin, if any
+        base = page.url.rstrip("/")
+        for url in (base, f"{base}/"):
+            other = self.pages.get(url)
+            if other and other is not page:
+                self._add_routes(other)
+
+    def _relink(self, page: Page) -> None:
+        if not page.url:
+            return
+        page.prev_page = self._get_prev(page)
+        page.next_page = self._get_next(page)
 
     def _get_prev(self, page: Page) -> Page:
         index = page.index
         if index <= 0:
-            return Page()
+            return NULL_PAGE
         lang = page.lang
         prev_url = self.urls[lang][index - 1]
         return self.pages[prev_url]
@@ -383,7 +828,7 @@ class Nav:
         index = page.index
         lang = page.lang
         if index >= self._max_index[lang]:
-            return Page()
+            return NULL_PAGE
 
         next_url = self.urls[lang][index + 1]
         return self.pages[next_url]
@@ -393,6 +838,8 @@ class Nav:
         return "/".join([slugify(part) for part in url.split("/")])
 
     def _log_initial_status(self) -> None:
+        if not is_debug():
+            return
         for name in "pages,toc,languages".split(","):
             log_data = json.dumps(
                 getattr(self, name),
@@ -404,24 +851,67 @@ class Nav:
 
 
 INDEX = "index.md"
-
-
-def get_pages_in_folder(path: TStrOrPath) -> TPages:
-    def recursive_listdir(path, prefix=""):
+DEFAULT_IGNORE = ("node_modules", "__pycache__", ".*")
+
+
+def get_pages_in_folder(
+    path: TStrOrPath,
+    *,
+    ignore: t.Iterable[str] = DEFAULT_IGNORE,
+    parallel: bool = False,
+) -> TPages:
+    """
+    Build the pages list from the markdown files in a folder, using
+    the subfolders as sections.
+
+    Files and folders whose name, or path relative to `path`, match any
+    of the `ignore` glob patterns are skipped.
+    If `parallel` is `True`, each top-level folder is scanned in a thread.
+    """
+    rx_ignore = None
+    ignore = list(ignore)
+    if ignore:
+        rx_ignore = re.compile("|".join(fnmatch.translate(pattern) for pattern in ignore))
+
+    def is_ignored(name: str, relpath: str) -> bool:
+        return bool(rx_ignore and (rx_ignore.match(name) or rx_ignore.match(relpath)))
+
+    def scan(path: str, prefix: str = "") -> list[os.DirEntry]:
+        with os.scandir(path) as it:
+            entries = [
+                entry for entry in it
+                if not is_ignored(entry.name, os.path.join(prefix, entry.name))
+            ]
+        entries.sort(key=lambda entry: entry.name)
+        return entries
+
+    def recursive_scandir(
+        path: str,
+        prefix: str = "",
+        executor: ThreadPoolExecutor | None = None,
+    ) -> list:
         items = []
-        for item_name in sorted(os.listdir(path)):
-            item_prefixed = os.path.join(prefix, item_name)
-            item_path = os.path.join(path, item_name)
-            if os.path.isfile(item_path):
-                if item_name.endswith(".md"):
+        for entry in scan(path, prefix):
+            item_prefixed = os.path.join(prefix, entry.name)
+            if entry.is_file():
+                if entry.name.endswith(".md"):
                     items.append(item_prefixed)
-            else:
-                item = recursive_listdir(item_path, prefix=item_prefixed)
-                items.append(item)
-
+            elif entry.is_dir():
+                if executor:
+                    items.append(
+                        executor.submit(recursive_scandir, entry.path, item_prefixed)
+                    )
+                else:
+                    items.append(recursive_scandir(entry.path, prefix=item_prefixed))
+
+        items = [item.result() if isinstance(item, Future) else item for item in items]
         if INDEX in items:
             items.remove(INDEX)
             items.insert(0, INDEX)
         return [os.path.basename(path), items]
 
-    return recursive_listdir(str(path))[1]
+    if not parallel:
+        return recursive_scandir(str(path))[1]
+
+    with ThreadPoolExecutor() as executor:
+        return recursive_scandir(str(path), executor=executor)[1]
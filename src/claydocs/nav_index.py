@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .utils import META_START, logger, parse_front_matter
+
+
+NAV_INDEX = "nav-index.json"
+NAV_INDEX_VERSION = 1
+
+rx_markdwown_h1 = re.compile(r"(^|\n)#\s+(?P<h1>[^\n]+)(\n|$)")
+rx_html_h1 = re.compile(r"<h1>(?P<h1>.+)</h1>", re.IGNORECASE)
+
+# (title, meta)
+TPageHeader = tuple[str, dict]
+
+
+def read_page_header(filepath: Path) -> TPageHeader:
+    """
+    Reads the front matter of a markdown file and, if it doesn't have a
+    title, the lines until the first H1. Unlike `load_markdown_metadata`,
+    the rest of the file is not read.
+
+    Returns the title (or an empty string if none was found) and the
+    front matter metadata, without the title.
+    """
+    meta = {}
+    with filepath.open() as file:
+        line = ""
+        for line in file:
+            if line.strip():
+                break
+
+        if line.lstrip().startswith(META_START):
+            front_matter = [line.strip().lstrip("- ") + "\n"]
+            for line in file:
+                if line.startswith(META_START):
+                    break
+                front_matter.append(line)
+            meta = parse_front_matter("".join(front_matter), filepath)
+            line = ""
+
+        title = meta.pop("title", None)
+        if title:
+            return title, meta
+
+        html_title = ""
+        while True:
+            match = rx_markdwown_h1.match(line)
+            if match:
+                return match.group("h1"), meta
+            if not html_title:
+                match = rx_html_h1.search(line)
+                if match:
+                    html_title = match.group("h1")
+            line = file.readline()
+            if not line:
+                return html_title, meta
+
+
+class NavIndex:
+    """
+    Persisted index of the pages titles and metadata, so only the files
+    that have changed since the last run have to be read.
+
+    Each entry is keyed by the filename, relative to the content folder,
+    and is valid while the `mtime_ns` and size of the file doesn't change.
+    """
+
+    path: Path | None
+    entries: dict[str, dict[str, t.Any]]
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self.entries = self._load()
+
+    def get_headers(
+        self,
+        content_folder: Path,
+        filenames: t.Iterable[str],
+    ) -> dict[str, TPageHeader]:
+        """
+        Returns the `(title, meta)` of every file, reading only the
+        new or changed ones, in a thread pool.
+        Entries of files not in `filenames` are removed from the index.
+        """
+        entries = {}
+        stale = {}
+        for filename in filenames:
+            stat = (content_folder / filename).stat()
+            entry = self.entries.get(filename)
+            if (
+                entry
+                and entry["mtime"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                entries[filename] = entry
+            else:
+                stale[filename] = stat
+
+        if stale:
+            logger.debug(f"Reading {len(stale)} changed pages headers")
+            with ThreadPoolExecutor() as executor:
+                headers = executor.map(
+                    read_page_header,
+                    [content_folder / filename for filename in stale],
+                )
+                for (filename, stat), (title, meta) in zip(stale.items(), headers):
+                    entries[filename] = self._make_entry(stat, title, meta)
+
+        changed = bool(stale) or entries.keys() != self.entries.keys()
+        self.entries = entries
+        if changed:
+            self._save()
+
+        return {
+            filename: (entry["title"], dict(entry["meta"]))
+            for filename, entry in entries.items()
+        }
+
+    def update(self, content_folder: Path, filename: str) -> TPageHeader:
+        """
+        Read again the `(title, meta)` of a single file and
+        update its entry in the index.
+        """
+        filepath = content_folder / filename
+        stat = filepath.stat()
+        title, meta = read_page_header(filepath)
+        self.entries[filename] = self._make_entry(stat, title, meta)
+        self._save()
+        return title, dict(meta)
+
+    # Private
+
+    def _make_entry(self, stat: os.stat_result, title: str, meta: dict) -> dict:
+        return {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "title": title,
+            "slug": meta.get("slug", ""),
+            "description": meta.get("description", ""),
+            "meta": meta,
+        }
+
+    def _load(self) -> dict[str, dict[str, t.Any]]:
+        if not self.path or not self.path.is_file():
+            return {}
+        try:
+            data = json.loads(self.path.read_text())
+        except ValueError:
+            logger.debug(f"Invalid nav index {self.path}")
+            return {}
+        if data.get("version") != NAV_INDEX_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+
+        entries = {}
+        for filename, entry in self.entries.items():
+            # The metadata could have values, like dates, that can't be
+            # restored from JSON, so those entries are not persisted.
+            try:
+                if json.loads(json.dumps(entry["meta"])) != entry["meta"]:
+                    continue
+            except (TypeError, ValueError):
+                continue
+            entries[filename] = entry
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(
+            {"version": NAV_INDEX_VERSION, "entries": entries},
+            ensure_ascii=False,
+        ))
+        os.replace(tmp_path, self.path)
@@ -74,10 +74,6 @@ Consecutive headers aren't a problem:
 '''
 import re
 
-from bs4 import BeautifulSoup, NavigableString
-
-from markdown.extensions.toc import nest_toc_tokens, slugify_unicode
-
 
 HEADERS = [
     "h1",
@@ -103,6 +99,9 @@ def get_text(child) -> str:
 
 
 def outline(html, id_prefix="s", wrapper_cls="section%(LEVEL)d"):
+    from bs4 import BeautifulSoup, NavigableString
+    from markdown.extensions.toc import nest_toc_tokens, slugify_unicode
+
     soup = BeautifulSoup(html, 'html.parser')
 
     toc_tokens = []
@@ -0,0 +1,274 @@
+import asyncio
+import mimetypes
+import os
+import re
+import typing as t
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import quote
+
+from .http_server import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    HTTP_NOT_FOUND,
+    HTTP_NOT_MODIFIED,
+    HTTP_OK,
+    START_MESSAGE,
+    AsyncHTTPServer,
+    can_keep_alive,
+    choose_encoding,
+    get_path,
+    is_not_modified,
+    write_head,
+)
+from .utils import logger
+
+
+HTTP_MOVED = "301 Moved Permanently"
+HTTP_PARTIAL = "206 Partial Content"
+HTTP_NOT_ALLOWED = "405 Method Not Allowed"
+HTTP_NOT_SATISFIABLE = "416 Range Not Satisfiable"
+
+# The precompressed siblings of a file, by encoding
+PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+INDEX_FILE = "index.html"
+TEXT_TYPES = ("application/javascript", "application/json", "image/svg+xml")
+
+RX_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class StaticFile:
+    """The metadata of a file of the build, and of its precompressed siblings."""
+
+    __slots__ = (
+        "path",
+        "size",
+        "mtime",
+        "etag",
+        "last_modified",
+        "content_type",
+        "variants",
+    )
+
+    def __init__(self, path: Path, stat: os.stat_result, content_type: str = "") -> None:
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.content_type = content_type
+        # The precompressed files, by encoding
+        self.variants: dict[str, StaticFile] = {}
+
+
+class PreviewServer(AsyncHTTPServer):
+    """
+    Serves the files of a finished build, as they are going to be
+    deployed, so they can be checked, or load-tested, without setting
+    up another web server.
+
+    The metadata of the files is read once, when the server starts.
+    The files are sent with `os.sendfile`, through `loop.sendfile`, and
+    if a browser accepts it, a `.br` or `.gz` sibling is sent instead.
+    """
+
+    def __init__(
+        self,
+        folder: str | Path,
+        *,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        shutdown_delay: float = 1,
+    ) -> None:
+        super().__init__(host=host, port=port, shutdown_delay=shutdown_delay)
+        self.folder = Path(folder).resolve()
+        # The files by URL
+        self.files: dict[str, StaticFile] = {}
+
+    def index(self) -> None:
+        """Read the metadata of all the files of the folder."""
+        files = {}
+        for root, _, filenames in os.walk(self.folder):
+            root_path = Path(root)
+            names = set(filenames)
+            for name in filenames:
+                path = root_path / name
+                suffix = path.suffix
+                if suffix in PRECOMPRESSED.values() and path.stem in names:
+                    # Added as a variant of the uncompressed file
+                    continue
+
+                content_type = get_content_type(name)
+                file = StaticFile(path, path.stat(), content_type)
+                for encoding, ext in PRECOMPRESSED.items():
+                    if f"{name}{ext}" in names:
+                        sibling = path.with_name(f"{name}{ext}")
+                        file.variants[encoding] = StaticFile(
+                            sibling, sibling.stat(), content_type
+                        )
+
+                url = "/" + path.relative_to(self.folder).as_posix()
+                files[url] = file
+                if name == INDEX_FILE:
+                    files[url.removesuffix(INDEX_FILE)] = file
+
+        self.files = files
+        logger.info(f"{len(files)} files in {self.folder}")
+
+    def serve(self) -> None:
+        self.start()
+        print(START_MESSAGE.format(addr=f"http://{self.host}:{self.port}"))
+        while self.serve_thread.is_alive():
+            # Wait with a timeout, otherwise on Windows we can't receive KeyboardInterrupt.
+            self.serve_thread.join(self.shutdown_delay)
+
+    def start(self) -> None:
+        """Index the files and serve the requests in another thread."""
+        self.index()
+        super().start()
+
+    # Private
+
+    async def _respond(
+        self,
+        request: dict,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        """Write the response and returns if the connection can be reused."""
+        keep_alive = can_keep_alive(request)
+        method = request["REQUEST_METHOD"]
+        path = get_path(request)
+        headers: dict[str, str] = {"Server": "claydocs"}
+
+        file = self.files.get(path)
+        if method not in ("GET", "HEAD"):
+            status = HTTP_NOT_ALLOWED
+            headers["Allow"] = "GET, HEAD"
+            file = None
+        elif file is None:
+            if f"{path}/" in self.files:
+                status = HTTP_MOVED
+                location = quote(f"{path}/")
+                if request["QUERY_STRING"]:
+                    location = f"{location}?{request['QUERY_STRING']}"
+                headers["Location"] = location
+            else:
+                status = HTTP_NOT_FOUND
+
+        if file is None:
+            if status == HTTP_MOVED:
+                logger.info(f"{path} -> {headers['Location']}")
+            else:
+                logger.warning(f"{path} - {status}")
+            headers["Content-Length"] = "0"
+            write_head(writer, status, headers.items(), keep_alive)
+            return keep_alive
+
+        status, file, start, length = self._select(request, file, headers)
+        logger.debug(f"{path} - {status}")
+        write_head(writer, status, headers.items(), keep_alive)
+        if method == "GET" and length:
+            with open(file.path, "rb") as fileobj:
+                await writer.drain()
+                await self.loop.sendfile(  # type: ignore
+                    writer.transport, fileobj, start, length
+                )
+        return keep_alive
+
+    def _select(
+        self,
+        request: dict,
+        file: StaticFile,
+        headers: dict[str, str],
+    ) -> tuple[str, StaticFile, int, int]:
+        """
+        The status, the file to send, that could be a precompressed one,
+        and the part of it, `(start, length)`. Adds the response headers.
+        """
+        headers["Content-Type"] = file.content_type
+        headers["Last-Modified"] = file.last_modified
+        headers["Accept-Ranges"] = "bytes"
+        if file.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        range_header = request.get("HTTP_RANGE")
+        if_range = request.get("HTTP_IF_RANGE")
+        if if_range and if_range not in (file.etag, file.last_modified):
+            # Changed since the browser got the first part
+            range_header = None
+
+        # The ranges are of the uncompressed file
+        if file.variants and not range_header:
+            encoding = choose_encoding(
+                request.get("HTTP_ACCEPT_ENCODING", ""), tuple(file.variants)
+            )
+            if encoding:
+                headers["Content-Encoding"] = encoding
+                file = file.variants[encoding]
+
+        headers["ETag"] = file.etag
+        if is_not_modified(request, file.etag, file.mtime):
+            return HTTP_NOT_MODIFIED, file, 0, 0
+
+        if range_header:
+            byte_range = parse_range(range_header, file.size)
+            if byte_range is None:
+                headers["Content-Range"] = f"bytes */{file.size}"
+                headers["Content-Length"] = "0"
+                return HTTP_NOT_SATISFIABLE, file, 0, 0
+            if byte_range:
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end}/{file.size}"
+                headers["Content-Length"] = str(end - start + 1)
+                return HTTP_PARTIAL, file, start, end - start + 1
+
+        headers["Content-Length"] = str(file.size)
+        return HTTP_OK, file, 0, file.size
+
+
+def get_content_type(filename: str) -> str:
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in TEXT_TYPES:
+        content_type = f"{content_type}; charset=utf-8"
+    return content_type
+
+
+def parse_range(value: str, size: int) -> tuple[int, int] | t.Literal[False] | None:
+    """
+    The first and last byte, of a file of `size` bytes, of a `Range` header.
+    Returns `None` if the range can't be satisfied, and `False` to ignore
+    the header, for example, if it asks for several ranges.
+
+    >>> parse_range("bytes=0-99", 1000)
+    (0, 99)
+    >>> parse_range("bytes=900-", 1000)
+    (900, 999)
+    >>> parse_range("bytes=-100", 1000)
+    (900, 999)
+    >>> parse_range("bytes=1000-", 1000) is None
+    True
+    >>> parse_range("bytes=0-9,20-29", 1000)
+    False
+    >>> parse_range("bytes=10-5", 1000)
+    False
+    """
+    match = RX_RANGE.fullmatch(value.strip())
+    if not match or match.group(0) == "bytes=-":
+        return False
+
+    first, last = match.groups()
+    if not first:
+        # The last N bytes
+        length = int(last)
+        if not length or not size:
+            return None
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return False
+    if start >= size:
+        return None
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
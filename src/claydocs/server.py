@@ -1,37 +1,51 @@
+import asyncio
+import gzip
+import hashlib
 import html
 import logging
 import re
-import socketserver
 import traceback
 import threading
+import time
 import typing as t
-import wsgiref.simple_server
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 from pathlib import Path
-from urllib.parse import quote
+from urllib.parse import parse_qs, quote
 from sys import exc_info
 
-import watchdog.events
-import watchdog.observers.polling
-from watchdog.observers.api import ObservedWatch
-
-from .utils import logger, timestamp
-
-
-DEFAULT_HOST = "0.0.0.0"
-DEFAULT_PORT = 8080
-START_MESSAGE = """
-─────────────────────────────────────────────────
- Running on {addr}
- Press [Ctrl]+[C] to quit
-─────────────────────────────────────────────────
-"""
-STATIC_FILES = ("/favicon.ico", "/robots.txt", "/humans.txt")
+from .http_server import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    HTTP_ERROR,
+    HTTP_NOT_FOUND,
+    HTTP_NOT_MODIFIED,
+    HTTP_OK,
+    START_MESSAGE,
+    AsyncHTTPServer,
+    can_keep_alive,
+    choose_encoding,
+    get_path,
+    is_not_modified,
+    write_head,
+)
+from .utils import Redirect, logger, timestamp
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+STATIC_FILES = frozenset(("/favicon.ico", "/robots.txt", "/humans.txt"))
 LIVERELOAD_URL = "/livereload/"
 RX_LIVERELOAD = re.compile(rf"{LIVERELOAD_URL}([0-9]+)/?")
+# Server-Sent Events stream of the epochs, used instead of the long polling
+# of `LIVERELOAD_URL` by the browsers that support it
+LIVERELOAD_EVENTS_URL = f"{LIVERELOAD_URL}events"
+# Seconds between the comments sent to keep an idle events stream open
+EVENTS_HEARTBEAT = 30
 
-HTTP_OK = "200 OK"
-HTTP_NOT_FOUND = "404 Not Found"
-HTTP_ERROR = "500 Internal Server Error"
 ERROR_BODY = """<body>
 <title>{title}</title>
 <h1>{title}</h1>
@@ -40,14 +54,33 @@ ERROR_BODY = """<body>
 </body>
 """
 
+# Seconds without new file changes to wait before refreshing, so all
+# the changes of, for example, a `git checkout` are refreshed together
+DEBOUNCE_DELAY = 0.2
+# But don't wait more than this, in seconds, if the changes never stop
+DEBOUNCE_MAX_DELAY = 2
+
+# Pages smaller than this, in bytes, are not compressed
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# The encodings the pages can be compressed with, by preference
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
 HERE = Path(__file__).parent
 SCRIPT_TEMPLATE = (HERE / "livereload.js").read_text()
 
-rx_index = re.compile(r"/index$", re.IGNORECASE)
 
+class LiveReloadServer(AsyncHTTPServer):
+    """
+    A development server that serves the pages of the docs and reloads
+    the browsers when a file changes.
 
-class LiveReloadServer(socketserver.ThreadingMixIn, wsgiref.simple_server.WSGIServer,):
-    daemon_threads = True
+    All the connections are handled in one asyncio event loop, so an
+    open browser tab waiting for a reload doesn't take a thread.
+    The WSGI `application`, that renders the pages and serves the static
+    files, runs in a thread pool.
+    """
     poll_response_timeout = 60
 
     def __init__(
@@ -58,48 +91,90 @@ class LiveReloadServer(socketserver.ThreadingMixIn, wsgiref.simple_server.WSGISe
         host: str = DEFAULT_HOST,
         port: int = DEFAULT_PORT,
         shutdown_delay: float = 1,
-        **kwargs,
+        max_workers: int | None = None,
+        polling: bool = False,
+        debounce: float = DEBOUNCE_DELAY,
+        get_page_key: t.Callable[[str], str] | None = None,
     ) -> None:
+        super().__init__(host=host, port=port, shutdown_delay=shutdown_delay)
         self._get_page = get_page
         self._refresh = refresh
+        # The same key for all the accepted forms of the URL of a page.
+        # Without it, each URL is a different page.
+        self._get_page_key = get_page_key
 
-        self.host = host
-        self.port = port
-        self.shutdown_delay = shutdown_delay
+        self.polling = polling
+        self.debounce = debounce
 
         # This version of the docs
         self.epoch = timestamp()
-        # Must be held when accessing epoch
+        # Newer versions of single pages, by `self.page_key(url)`
+        self.page_epochs: dict[str, int] = {}
+        # The rendered pages, by `self.page_key(url)`, until they are reloaded
+        self.responses: dict[str, PageResponse] = {}
+        # Must be held when updating epoch or page_epochs
         self.epoch_cond = threading.Condition()
-
-        self.must_refresh = False
-        # Must be held when accessing must_refresh.
+        # The encoded live reload scripts, by epoch
+        self.scripts: dict[int, bytes] = {}
+
+        # The files changed since the last refresh, and when the
+        # first and the last of those changes were detected.
+        self.changed_paths: set[str] = set()
+        self.first_change = 0.0
+        self.last_change = 0.0
+        # Must be held when accessing changed_paths, first_change or last_change.
         self.must_refresh_cond = threading.Condition()
 
-        self.serve_thread = threading.Thread(
-            target=lambda: self.serve_forever(shutdown_delay)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="claydocs",
         )
-        self.observer = watchdog.observers.polling.PollingObserver()
-        self.watch_refs: dict[str, ObservedWatch] = {}
+        # Livereload requests waiting for a new epoch, and their page key
+        self._epoch_waiters: dict[asyncio.Future, str] = {}
+        # Open livereload events streams, and their page key
+        self._event_streams: dict[asyncio.StreamWriter, str] = {}
+
+        # Created by the first `watch()`, so watchdog is only imported if needed
+        self.observer = None
+        self.watch_refs: dict[str, t.Any] = {}
         self.running = False
 
-        super().__init__((host, port), RequestHandler, **kwargs)
-
     def watch(self, path_to_watch: Path, recursive: bool = True) -> None:
         """Add the 'path' to watched paths, call the function and reload
         when any file changes under it."""
+        import watchdog.events
+
         path = str(path_to_watch.absolute())
         if path in self.watch_refs:
             return
+        if self.observer is None:
+            if self.polling:
+                import watchdog.observers.polling
+                self.observer = watchdog.observers.polling.PollingObserver()
+            else:
+                # inotify on Linux, FSEvents on macOS, etc.
+                import watchdog.observers
+                self.observer = watchdog.observers.Observer()
+
+        # The native observers also report when a file is opened or closed,
+        # and the files are read while rendering.
+        event_types = (
+            watchdog.events.EVENT_TYPE_CREATED,
+            watchdog.events.EVENT_TYPE_DELETED,
+            watchdog.events.EVENT_TYPE_MODIFIED,
+            watchdog.events.EVENT_TYPE_MOVED,
+        )
 
         def callback(event):
-            if event.is_directory:
+            if event.is_directory or event.event_type not in event_types:
                 return
             logger.debug(str(event))
-            with self.must_refresh_cond:
-                self.must_refresh = True
-                self.must_refresh_cond.notify_all()
-            self._refresh(event.src_path)
+            paths = [event.src_path]
+            # A renamed file is both a removed and an added one
+            dest_path = getattr(event, "dest_path", "")
+            if dest_path:
+                paths.append(dest_path)
+            self.add_changes(paths)
 
         handler = watchdog.events.FileSystemEventHandler()
         handler.on_any_event = callback
@@ -108,72 +183,171 @@ class LiveReloadServer(socketserver.ThreadingMixIn, wsgiref.simple_server.WSGISe
             handler, path, recursive=recursive
         )
 
-    def application(self, environ: dict, start_response: t.Callable) -> list[bytes]:
-        self.request = Request(environ)
-        path = self.request.path
-        if path.startswith(LIVERELOAD_URL):
-            return self.livereload(path, start_response)
-
-        self.headers = {"Server": "claydocs"}
-        str_body, status = self.call()
-        body = str_body.encode("utf8")
-        body = self._inject_js_into_html(body)
-
-        self.headers["Content-Length"] = str(len(body))
-        start_response(status, list(self.headers.items()))
-        return [body]
+    def add_changes(self, paths: t.Iterable[str]) -> None:
+        """
+        Schedule a refresh of the changed files. The refresh loop waits
+        for the changes to stop before calling `refresh` with all of them.
+        """
+        now = time.monotonic()
+        with self.must_refresh_cond:
+            if not self.changed_paths:
+                self.first_change = now
+            self.last_change = now
+            self.changed_paths.update(str(path) for path in paths)
+            self.must_refresh_cond.notify_all()
+
+    def page_key(self, url: str) -> str:
+        """The key of the page of this URL."""
+        if self._get_page_key is None:
+            return url
+        return self._get_page_key(url)
+
+    def epoch_for(self, url: str) -> int:
+        """The version of the page of this URL."""
+        return max(self.epoch, self.page_epochs.get(self.page_key(url), 0))
+
+    def script_for(self, epoch: int) -> bytes:
+        """The encoded live reload script of an epoch, rendered only once."""
+        script = self.scripts.get(epoch)
+        if script is None:
+            js = SCRIPT_TEMPLATE.replace("__EPOCH__", str(epoch))
+            script = self.scripts[epoch] = f"<script>{js}</script>".encode()
+        return script
 
-    def livereload(self, path: str, start_response: t.Callable) -> list[bytes]:
-        headers = [("Content-Type", "text/plain")]
+    def application(self, environ: dict, start_response: t.Callable) -> list[bytes]:
+        request = Request(environ)
+        key = self.page_key(request.path)
+        # Taken before rendering, so if the page is reloaded meanwhile it is
+        # not cached, and its script makes the browser ask for it again.
+        epoch = self.epoch_for(request.path)
+        response = self.responses.get(key)
+        if response is None:
+            str_body, status = self.call(request)
+            body = str_body.encode("utf8")
+            if status != HTTP_OK or not body or "Location" in request.response_headers:
+                body = self._inject_js_into_html(body, request.path)
+                request.response_headers["Content-Length"] = str(len(body))
+                start_response(status, list(request.response_headers.items()))
+                return [body]
+            response = PageResponse(body, request.response_headers["Content-Type"])
+            self._cache_response(request.path, epoch, response)
+
+        encoding = ""
+        if len(response.body) >= MIN_COMPRESS_SIZE:
+            encoding = choose_encoding(environ.get("HTTP_ACCEPT_ENCODING", ""), ENCODINGS)
+        if encoding and request.method == "HEAD":
+            # Not compressed just to tell its length, unless it already is
+            variant = response.variants.get(encoding)
+            if not variant or variant[0] != epoch:
+                encoding = ""
+
+        # The script of the page changes with the epoch
+        etag = f'"{response.digest}-{epoch}{"-" + encoding if encoding else ""}"'
+        headers = request.response_headers
+        headers["Content-Type"] = response.content_type
+        headers["ETag"] = etag
+        headers["Last-Modified"] = response.last_modified
+        # Always revalidated, so the changes are seen at once
+        headers["Cache-Control"] = "no-cache"
+        headers["Vary"] = "Accept-Encoding"
+        if is_not_modified(environ, etag, response.mtime):
+            start_response(HTTP_NOT_MODIFIED, list(headers.items()))
+            return []
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            chunks = [self._get_compressed_body(request.path, response, epoch, encoding)]
+        else:
+            # The page is not copied, the script is written between its two halves
+            view = memoryview(response.body)
+            end = response.body_end
+            chunks = [view[:end], self.script_for(epoch), view[end:]]
+        headers["Content-Length"] = str(sum(len(chunk) for chunk in chunks))
+        start_response(HTTP_OK, list(headers.items()))
+        return [] if request.method == "HEAD" else chunks
+
+    async def livereload(self, path: str, page: str = "") -> tuple[str, bytes]:
         match = RX_LIVERELOAD.fullmatch(path)
         if not match:
-            start_response(HTTP_NOT_FOUND, headers)
-            return [b""]
+            return HTTP_NOT_FOUND, b""
 
-        start_response(HTTP_OK, headers)
         epoch = int(match[1])
+        if self.epoch_for(page) <= epoch:
+            # Stall the browser, respond as soon as there's something new.
+            # If there's not, respond anyway after a timeout
+            waiter = asyncio.get_running_loop().create_future()
+            self._epoch_waiters[waiter] = self.page_key(page)
+            try:
+                await asyncio.wait_for(waiter, timeout=self.poll_response_timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._epoch_waiters.pop(waiter, None)
+
+        return HTTP_OK, b"%d" % self.epoch_for(page)
+
+    async def livereload_events(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        page: str = "",
+    ) -> None:
+        """
+        Keep the connection open and push the new epochs of the page
+        to the browser, starting with the current one, until it disconnects.
+        """
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+            b"data: %d\n\n" % self.epoch_for(page)
+        )
+        self._event_streams[writer] = self.page_key(page)
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(reader.read(1024), timeout=EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+                    continue
+                if not data:
+                    # Disconnected
+                    return
+        finally:
+            self._event_streams.pop(writer, None)
 
-        def condition():
-            return self.epoch > epoch
-
-        with self.epoch_cond:
-            if not condition():
-                # Stall the browser, respond as soon as there's something new.
-                # If there's not, respond anyway after a timeout
-                self.epoch_cond.wait_for(condition, timeout=self.poll_response_timeout)
-            return [b"%d" % self.epoch]
-
-    def call(self) -> tuple[str, str]:
-        if self.request.path in STATIC_FILES:
-            return self.redirect_to(f"/static{self.request.path}")
-
-        if self.request.path.endswith("/index"):
-            url = rx_index.sub("/", self.request.path)
-            return self.redirect_to(url)
+    def call(self, request: "Request") -> tuple[str, str]:
+        if request.path in STATIC_FILES:
+            return self.redirect_to(request, f"/static{request.path}")
 
         status = HTTP_OK
-        if self.request.method == "HEAD":
+        if request.method == "HEAD":
             body = ""
         else:
-            body, status = self.get_page()
+            body, status = self.get_page(request)
 
-        self.headers.setdefault("Content-Type", "text/html; charset=utf-8")
+        request.response_headers.setdefault("Content-Type", "text/html; charset=utf-8")
         return body, status
 
-    def redirect_to(self, path: str) -> tuple[str, str]:
+    def redirect_to(self, request: "Request", path: str) -> tuple[str, str]:
         location = quote(path.encode("utf8"))
-        self.headers["Location"] = location
-        logger.info(f"{self.request.path} -> {location}")
+        request.response_headers["Location"] = location
+        logger.info(f"{request.path} -> {location}")
         return "", "302 Found"
 
-    def get_page(self) -> tuple[str, str]:
-        path = self.request.path
+    def get_page(self, request: "Request") -> tuple[str, str]:
+        path = request.path
         try:
-            body = self._get_page(path.rstrip("/"))
+            body = self._get_page(path)
         except Exception as exception:
             logger.exception(path)
             return self.render_error_page(exception)
 
+        if isinstance(body, Redirect):
+            return self.redirect_to(request, body.location)
+
         if body:
             return body, HTTP_OK
 
@@ -190,92 +364,326 @@ class LiveReloadServer(socketserver.ThreadingMixIn, wsgiref.simple_server.WSGISe
         return body, HTTP_ERROR
 
     def serve(self) -> None:
-        self.running = True
-        self.observer.start()
+        self.start()
         print(START_MESSAGE.format(addr=f"http://{self.host}:{self.port}"))
-        self.serve_thread.start()
         self.refresh_loop()
 
+    def start(self) -> None:
+        """Start watching the files and serving the requests, in other threads."""
+        if self.observer:
+            self.observer.start()
+        super().start()
+
     def refresh_loop(self) -> None:
         while True:
             with self.must_refresh_cond:
                 while not self.must_refresh_cond.wait_for(
-                    lambda: self.must_refresh or not self.running,
+                    lambda: self.changed_paths or not self.running,
                     timeout=self.shutdown_delay,
                 ):
                     # We could have used just one wait instead of a loop + timeout, but we need
                     # occasional breaks, otherwise on Windows we can't receive KeyboardInterrupt.
                     pass
+                while self.running:
+                    delay = min(
+                        self.last_change + self.debounce,
+                        self.first_change + DEBOUNCE_MAX_DELAY,
+                    ) - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.must_refresh_cond.wait(min(delay, self.shutdown_delay))
                 if not self.running:
                     return
-                logger.info("Detected file changes")
-                self.must_refresh = False
-
-            with self.epoch_cond:
+                paths, self.changed_paths = self.changed_paths, set()
+
+            logger.info("Detected file changes")
+            try:
+                urls = self._refresh(sorted(paths))
+            except Exception:
+                logger.exception("Error refreshing")
+                urls = None
+            if urls is None or urls:
+                self.reload(urls)
+
+    def reload(self, urls: t.Iterable[str] | None = None) -> None:
+        """
+        Start a new epoch, so the browsers reload the page. If `urls` is
+        given, only those pages are reloaded.
+        """
+        epoch = timestamp()
+        with self.epoch_cond:
+            if urls is None:
                 logger.info("Reloading page...")
-                self.epoch = timestamp()
-                self.epoch_cond.notify_all()
+                self.epoch = epoch
+                keys = None
+                self.responses.clear()
+            else:
+                keys = {self.page_key(url) for url in urls}
+                logger.info(f"Reloading {', '.join(sorted(urls))}...")
+                for key in keys:
+                    self.page_epochs[key] = epoch
+                    self.responses.pop(key, None)
+            # Rendered again when needed, so the old ones doesn't pile up
+            self.scripts.clear()
+            self.epoch_cond.notify_all()
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._notify_epoch, epoch, keys)
 
     def shutdown(self) -> None:
-        self.observer.stop()
-        logger.info("Shutting down...")
-        self.running = False
-
-        if self.serve_thread.is_alive():
-            super().shutdown()
-
-    def _inject_js_into_html(self, content: bytes) -> bytes:
-        try:
-            body_end = content.rindex(b"</body>")
-        except ValueError:
-            body_end = len(content)
-        # The page will reload if the livereload poller returns a newer epoch than what it knows.
-        with self.epoch_cond:
-            script = SCRIPT_TEMPLATE.replace("__EPOCH__", str(self.epoch))
-
-        return b"%b<script>%b</script>%b" % (
-            content[:body_end],
-            script.encode(),
-            content[body_end:],
-        )
-
-
-class RequestHandler(wsgiref.simple_server.WSGIRequestHandler):
-    def log_request(
-        self,
-        code: str = "200",
-        _size: int | str = "-",
-    ) -> None:
-        message = self.path
-        code = str(code)
+        if self.observer:
+            self.observer.stop()
+        super().shutdown()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def log_request(self, path: str, status: str) -> None:
+        message = path
+        code = status[:3]
         if code.startswith("5"):
             level = logging.ERROR
         elif code.startswith("4"):
             level = logging.WARNING
             if code == "404":
-                message = f"{self.path} - NOT FOUND"
-        elif self.path.startswith(LIVERELOAD_URL):
+                message = f"{path} - NOT FOUND"
+        elif path.startswith(LIVERELOAD_URL):
             level = logging.DEBUG
         else:
             level = logging.INFO
 
         logger.log(level, message)
 
-    def log_message(self, format: str, *args) -> None:
-        logger.debug(format, *args)
+    # Private
+
+    def _inject_js_into_html(self, content: bytes, url: str) -> bytes:
+        body_end = find_body_end(content)
+        # The page will reload if the livereload poller returns a newer epoch than what it knows.
+        script = self.script_for(self.epoch_for(url))
+        return b"%b%b%b" % (content[:body_end], script, content[body_end:])
+
+    def _cache_response(self, url: str, epoch: int, response: "PageResponse") -> None:
+        """
+        Cache the page rendered in `epoch`, unless it was reloaded while
+        rendering it, because then it could be outdated.
+        """
+        with self.epoch_cond:
+            if self.epoch_for(url) == epoch:
+                self.responses[self.page_key(url)] = response
+
+    def _get_compressed_body(
+        self,
+        url: str,
+        response: "PageResponse",
+        epoch: int,
+        encoding: str,
+    ) -> bytes:
+        """
+        The body of the page with the live reload script, compressed with
+        `encoding`. A compressed body is cached until the page or its
+        epoch change, but only if they didn't change while compressing it.
+        """
+        variant = response.variants.get(encoding)
+        if variant and variant[0] == epoch:
+            return variant[1]
+
+        end = response.body_end
+        body = response.body[:end] + self.script_for(epoch) + response.body[end:]
+        body = compress(body, encoding)
+        with self.epoch_cond:
+            if self.epoch_for(url) == epoch and self.responses.get(self.page_key(url)) is response:
+                response.variants[encoding] = (epoch, body)
+        return body
+
+    def _notify_epoch(self, epoch: int, keys: set[str] | None) -> None:
+        """Wake up the browsers of the pages of `keys`, or all if it's `None`."""
+        # The same message is pushed to every stream
+        message = b"data: %d\n\n" % epoch
+        for stream, key in self._event_streams.items():
+            if (keys is None or key in keys) and not stream.is_closing():
+                stream.write(message)
+
+        for waiter, key in self._epoch_waiters.items():
+            if (keys is None or key in keys) and not waiter.done():
+                waiter.set_result(None)
+
+    async def _serve_forever(self) -> None:
+        asyncio.get_running_loop().set_default_executor(self.executor)
+        await super()._serve_forever()
+
+    async def _respond(
+        self,
+        environ: dict,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        """Write the response and returns if the connection can be reused."""
+        path = get_path(environ)
+        if path == LIVERELOAD_EVENTS_URL:
+            self.log_request(LIVERELOAD_EVENTS_URL, HTTP_OK)
+            await self.livereload_events(reader, writer, get_page_param(environ))
+            return False
+
+        keep_alive = can_keep_alive(environ)
+        head_only = environ["REQUEST_METHOD"] == "HEAD"
+
+        if path.startswith(LIVERELOAD_URL):
+            status, body = await self.livereload(path, get_page_param(environ))
+            headers = [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))]
+            chunks: t.Iterable[bytes] = [body]
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                status, headers, chunks = await loop.run_in_executor(
+                    self.executor, self._call_application, environ
+                )
+            except Exception:
+                logger.exception(path)
+                status, headers, chunks = HTTP_ERROR, [("Content-Length", "0")], []
+
+        self.log_request(path, status)
+        no_body = head_only or status[:3] in ("204", "304") or status.startswith("1")
+        names = {name.lower() for name, _ in headers}
+        chunked = keep_alive and "content-length" not in names and not no_body
+        if "content-length" not in names and not chunked and not no_body:
+            # The end of the body is the end of the connection
+            keep_alive = False
+
+        write_head(writer, status, headers, keep_alive, chunked)
+
+        try:
+            if not no_body:
+                await self._write_body(writer, chunks, chunked)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        return keep_alive
+
+    async def _write_body(
+        self,
+        writer: asyncio.StreamWriter,
+        chunks: t.Iterable[bytes],
+        chunked: bool,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        iterator = iter(chunks)
+        # Anything else could be reading a file, so it's done in the thread pool
+        in_memory = isinstance(chunks, (list, tuple))
+
+        while True:
+            if in_memory:
+                chunk = next(iterator, None)
+            else:
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+            if chunk is None:
+                break
+            if not chunk:
+                continue
+            if chunked:
+                writer.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+            else:
+                writer.write(chunk)
+            # The buffers in memory are written together
+            if not in_memory:
+                await writer.drain()
+        if in_memory:
+            await writer.drain()
+
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+
+    def _call_application(self, environ: dict) -> tuple[str, list, t.Iterable[bytes]]:
+        response = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response[:] = [status, headers]
+
+        chunks = self.application(environ, start_response)
+        if not response:
+            # The status is only known after the first chunk
+            iterator = iter(chunks)
+            first = next(iterator, b"")
+            chunks = _Chain(first, iterator, chunks)
+        status, headers = response
+        return status, headers, chunks
+
+
+class PageResponse:
+    """A rendered page, without the live reload script."""
+
+    __slots__ = (
+        "body",
+        "body_end",
+        "content_type",
+        "digest",
+        "mtime",
+        "last_modified",
+        "variants",
+    )
+
+    def __init__(self, body: bytes, content_type: str) -> None:
+        self.body = body
+        # Where the live reload script is inserted
+        self.body_end = find_body_end(body)
+        self.content_type = content_type
+        self.digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.mtime = int(time.time())
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        # The compressed bodies by encoding, and the epoch of their script
+        self.variants: dict[str, tuple[int, bytes]] = {}
+
+
+def find_body_end(content: bytes) -> int:
+    """The position of the closing `</body>` tag, or the end of the content."""
+    try:
+        return content.rindex(b"</body>")
+    except ValueError:
+        return len(content)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)  # type: ignore
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def get_page_param(environ: dict) -> str:
+    """The URL of the page of a livereload request."""
+    return parse_qs(environ.get("QUERY_STRING", "")).get("page", [""])[0]
+
+
+class _Chain:
+    """An already started WSGI response, that must be closed at the end"""
+
+    def __init__(self, first: bytes, iterator: t.Iterator[bytes], response: t.Any) -> None:
+        self.first = first
+        self.iterator = iterator
+        self.response = response
+
+    def __iter__(self) -> t.Iterator[bytes]:
+        yield self.first
+        yield from self.iterator
+
+    def close(self) -> None:
+        close = getattr(self.response, "close", None)
+        if close:
+            close()
 
 
 class Request:
+    """
+    The state of a single request, passed to the handlers of the server
+    so concurrent requests don't share anything. The handlers add the
+    headers of the response to `response_headers`.
+    """
+
     def __init__(self, environ: t.Optional[dict] = None, path: str = "") -> None:
         environ = environ or {}
         self.environ = environ
         self.path = path or self.get_path()
         self.method = environ.get("REQUEST_METHOD", "GET").upper()
         self.remote_addr = environ.get("REMOTE_ADDR", "127.0.0.1")
+        self.response_headers: dict[str, str] = {"Server": "claydocs"}
 
     def get_path(self) -> str:
-        path_info = self.environ.get("PATH_INFO")
-        if not path_info:
-            return "/"
-        path = path_info.encode("iso-8859-1", "replace").decode("utf-8", "replace")
-        return path
+        return get_path(self.environ)
@@ -1,12 +1,12 @@
 import logging
 import random
 import re
+import threading
 import time
 import typing as t
 from dataclasses import dataclass
 from pathlib import Path
 
-import jinjax
 import yaml
 
 from .exceptions import InvalidFrontMatter
@@ -17,6 +17,7 @@ except ImportError:  # pragma: no cover
     from yaml import SafeLoader  # type: ignore
 
 if t.TYPE_CHECKING:
+    import jinjax
     from .nav import Nav, Page
     from .server import LiveReloadServer
 
@@ -27,6 +28,9 @@ LOGGER_LEVEL = logging.INFO
 META_START = "---"
 META_END = "\n---"
 
+# Maximum size, in bytes of markdown source, of the `MarkdownCache`
+MARKDOWN_CACHE_SIZE = 64 * 1024 * 1024
+
 logger = logging.getLogger(LOGGER_NAME)
 logger.setLevel(LOGGER_LEVEL)
 
@@ -37,6 +41,12 @@ class DocsMetadata:
     version: str = ""
 
 
+@dataclass
+class Redirect:
+    """Returned by a `get_page` callback of the server to redirect the request"""
+    location: str
+
+
 class THasPaths:
     STATIC_FOLDER: str
     THEME_FOLDER: str
@@ -56,15 +66,17 @@ class THasPaths:
     build_folder_static: Path
     cache: bool
     cache_folder: Path
+    watch_polling: bool
     temp_folder: Path
     static_url: str
     add_ons: list[t.Any]
+    md_cache: "MarkdownCache"
     nav: "Nav"
     server: "LiveReloadServer"
 
 
 class THasRender(THasPaths):
-    catalog: jinjax.Catalog
+    catalog: "jinjax.Catalog"
     metadata: DocsMetadata
 
     def render_page(self, page: "Page", **kwargs) -> str:  # type: ignore
@@ -73,10 +85,13 @@ class THasRender(THasPaths):
     def render_social_card(self, page: "Page", **kwargs) -> str:  # type: ignore
         ...
 
-    def get_cached_page(self, url: str, **kwargs) -> str:  # type: ignore
+    def get_cached_page(self, url: str, **kwargs) -> "str | Redirect":  # type: ignore
         ...
 
-    def refresh(self, event) -> None:
+    def refresh(self, src_paths: t.Iterable[str]) -> "set[str] | None":  # type: ignore
+        ...
+
+    def get_middleware(self, application: t.Callable) -> t.Any:
         ...
 
 
@@ -95,12 +110,86 @@ def load_markdown_metadata(filepath: Path) -> tuple[str, dict]:
 
     source = source.strip().lstrip("- ")
     front_matter, source = source.split(META_END, 1)
+    meta = parse_front_matter(front_matter, filepath)
+    return source.strip().lstrip("- "), meta
+
+
+def parse_front_matter(front_matter: str, filepath: Path) -> dict:
     try:
         meta = yaml.load(front_matter, SafeLoader)
     except Exception as err:
         raise InvalidFrontMatter(str(filepath), *err.args)
+    return meta or {}
 
-    return source.strip().lstrip("- "), meta
+
+class MarkdownCache:
+    """
+    Cache of the already-split `(source, meta)` pairs of the markdown files,
+    so the same file is not read and its front matter parsed again and again
+    by the renderer. The `Nav` doesn't use it, because it only reads the
+    headers of the files (see `nav_index.read_page_header`).
+
+    An entry is valid while the `mtime_ns` and size of the file doesn't change.
+    The cache is bounded by the total size, in bytes, of the cached files;
+    the least recently used entries are discarded first.
+    """
+
+    def __init__(self, max_size: int = MARKDOWN_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.size = 0
+        # path -> (mtime_ns, size, source, meta)
+        self._entries: dict[str, tuple[int, int, str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, filepath: Path) -> tuple[str, dict]:
+        """
+        Returns the `(source, meta)` pair of the file, reading it only
+        if is not in the cache or if it has changed.
+        The `meta` dict is a copy so it can be safely modified.
+        """
+        stat = filepath.stat()
+        key = str(filepath)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                mtime_ns, size, source, meta = entry
+                if (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size):
+                    # Re-insert it as the most recently used
+                    self._entries[key] = entry
+                    return source, meta.copy()
+                self.size -= size
+
+        source, meta = load_markdown_metadata(filepath)
+        self._save(key, stat.st_mtime_ns, stat.st_size, source, meta)
+        return source, meta.copy()
+
+    def discard(self, filepath: Path) -> None:
+        """Forget the file, for example, because it was deleted."""
+        with self._lock:
+            entry = self._entries.pop(str(filepath), None)
+            if entry:
+                self.size -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _save(self, key: str, mtime_ns: int, size: int, source: str, meta: dict) -> None:
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.size -= old[1]
+            self._entries[key] = (mtime_ns, size, source, meta)
+            self.size += size
+
+            while self.size > self.max_size:
+                oldest = next(iter(self._entries))
+                self.size -= self._entries.pop(oldest)[1]
 
 
 RANDOM_MESSAGES = [
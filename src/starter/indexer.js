@@ -1,3 +1,6 @@
+// Optional: ClayDocs builds the search index in Python, but only with
+// an English stemmer. If this script exists, and Node is installed, it is
+// used to index the other languages with the stemmers of lunr-languages.
 var lunr = require("lunr");
 require("lunr-languages/lunr.stemmer.support")(lunr);
 const fs = require("node:fs");
@@ -7,17 +10,19 @@ function build_index([lang, outpath]) {
   outpath = outpath || "."
 
   if (lang !== "en") {
-    const lunr_lang = require(`lunr-languages/lunr.${lang}`)(lunr);
-    this.use(lunr_lang);
+    require(`lunr-languages/lunr.${lang}`)(lunr);
   }
 
   const idx = lunr(function() {
+    if (lang !== "en") {
+      this.use(lunr[lang]);
+    }
     this.ref("id");
     this.field("title", { boost: 10 });
     this.field("body");
     const docs =  JSON.parse(fs.readFileSync(`${outpath}/docs-${lang}.json`));
 
-    for (let doc in docs) {
+    for (const doc of docs) {
       this.add(doc)
     }
   })
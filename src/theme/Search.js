@@ -0,0 +1,149 @@
+(function(){
+/** The search box of the `Search` component.
+ * The search data, and lunr, are downloaded the first time the box gets
+ * the focus, with `SearchIndex` if the index is sharded, or with `SearchData`.
+ */
+
+const SEL_TARGET = ".Search"
+const SEL_RESULTS = ".SearchResults"
+const FORMAT_SHARDS = "shards"
+const MAX_RESULTS = 10
+const BODY_LENGTH = 160
+const RX_PLACEHOLDER = /\{(URL|TITLE|PARENT|BODY|SCORE)\}/g
+
+new MutationObserver( (mutationList) => {
+  mutationList.forEach( (mutation) => {
+    if (mutation.type !== "childList") return
+    mutation.addedNodes.forEach( (node) => {
+      // Node of type "element"
+      if (node.nodeType === 1) {
+        addEvents(node)
+      }
+    })
+  })
+})
+  .observe(document.body, {
+    subtree: true,
+    childList: true,
+    attributes: false,
+    characterData: false
+  })
+
+function addEvents (root) {
+  root.querySelectorAll(SEL_TARGET)
+    .forEach( (node) => {
+      if (node.dataset.searchReady) return
+      node.dataset.searchReady = "1"
+      setup(node)
+    })
+}
+
+function setup (node) {
+  const input = node.querySelector("input")
+  const output = node.querySelector(SEL_RESULTS)
+  const template = node.querySelector("template").innerHTML
+  let searcher = null
+  let last = 0
+
+  function getSearcher () {
+    if (!searcher) {
+      searcher = loadLunr(node.dataset.lunrUrl).then(
+        () => loadSearcher(node.dataset.searchUrl, node.dataset.searchFormat)
+      )
+      // Try again the next time
+      searcher.catch(() => { searcher = null })
+    }
+    return searcher
+  }
+
+  input.addEventListener("focus", getSearcher, { once: true })
+  input.addEventListener("input", async () => {
+    const query = input.value.trim()
+    const num = ++last
+    if (!query) {
+      output.innerHTML = ""
+      return
+    }
+    let results
+    try {
+      results = await (await getSearcher())(query)
+    } catch (err) {
+      // For example, an incomplete query like "title:"
+      console.debug(err)
+      return
+    }
+    if (num !== last) return
+    output.innerHTML = results.map((result) => render(template, result)).join("")
+  })
+}
+
+let lunrLoaded = null
+
+function loadLunr (url) {
+  if (window.lunr) return Promise.resolve()
+  if (!lunrLoaded) {
+    lunrLoaded = new Promise((resolve, reject) => {
+      const script = document.createElement("script")
+      script.src = url
+      script.onload = resolve
+      script.onerror = () => {
+        // Try again the next time
+        script.remove()
+        lunrLoaded = null
+        reject(new Error(`Could not load ${url}`))
+      }
+      document.head.appendChild(script)
+    })
+  }
+  return lunrLoaded
+}
+
+function loadSearcher (url, format) {
+  if (format === FORMAT_SHARDS) {
+    const index = new SearchIndex(url)
+    return Promise.resolve(async (query) => {
+      const results = (await index.search(query)).slice(0, MAX_RESULTS)
+      const docs = await index.getDocs(results.map((result) => result.ref))
+      return results.map((result, pos) => ({ score: result.score, doc: docs[pos] }))
+    })
+  }
+
+  return SearchData.load(url).then(({ docs, index }) => {
+    const idx = lunr.Index.load(index)
+    const docsById = new Map(docs.map((doc) => [doc.id, doc]))
+    return async (query) => idx.search(query).slice(0, MAX_RESULTS).map((result) => (
+      { score: result.score, doc: docsById.get(result.ref) }
+    ))
+  })
+}
+
+function render (template, { score, doc }) {
+  doc = doc || {}
+  // The indexer stores the titles and bodies already escaped, so they are
+  // turned into plain text, to be cut and escaped just once.
+  const body = toText(doc.body)
+  const values = {
+    URL: doc.loc,
+    TITLE: toText(doc.title),
+    PARENT: toText(doc.parent),
+    BODY: body.length > BODY_LENGTH ? `${body.slice(0, BODY_LENGTH).trimEnd()}…` : body,
+    SCORE: score.toFixed(3),
+  }
+  return template.replace(RX_PLACEHOLDER, (_, key) => escapeHTML(values[key] || ""))
+}
+
+function toText (html) {
+  if (!html) return ""
+  return new DOMParser().parseFromString(html, "text/html").body.textContent
+}
+
+function escapeHTML (value) {
+  return String(value)
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;")
+}
+
+addEvents(document)
+})()
@@ -0,0 +1,82 @@
+(function(){
+/** Loads the search data of `search-{lang}.json`, or `search-{lang}.json.gz`,
+ * decoding the compact format of `Docs(search_compact=True)` if needed.
+ * Returns the `{docs, index}` of the regular format.
+ *
+ *   const { docs, index } = await SearchData.load("/static/search-en.json")
+ *   const idx = lunr.Index.load(index)
+ */
+
+const COMPACT_FORMAT = "compact"
+const GZIP_MAGIC = [0x1f, 0x8b]
+
+async function load (url) {
+  const response = await fetch(url)
+  if (!response.ok) throw new Error(`${response.status} ${url}`)
+  let bytes = new Uint8Array(await response.arrayBuffer())
+
+  // Unless the server already decompressed it with a `Content-Encoding`
+  if (bytes[0] === GZIP_MAGIC[0] && bytes[1] === GZIP_MAGIC[1]) {
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"))
+    bytes = new Uint8Array(await new Response(stream).arrayBuffer())
+  }
+  return decode(JSON.parse(new TextDecoder().decode(bytes)))
+}
+
+function decode (data) {
+  if (data.format !== COMPACT_FORMAT) return data
+
+  const strings = data.strings
+  const columns = data.docs
+  const docs = []
+  const ids = []
+
+  columns.id.forEach((docId, pos) => {
+    const [urlSid, pageTitleSid] = data.pages[columns.page[pos]]
+    const url = strings[urlSid]
+    const pageTitle = strings[pageTitleSid]
+    const titleSid = columns.title[pos]
+    const anchorSid = columns.anchor[pos]
+    const raw = columns.raw[pos]
+
+    const doc = {
+      id: String(docId),
+      title: titleSid === null ? pageTitle : strings[titleSid],
+      body: columns.body[pos],
+      parent: titleSid === null ? "" : pageTitle,
+      loc: anchorSid === null ? url : `${url}#${strings[anchorSid]}`,
+    }
+    if (raw !== null) doc.raw = raw
+    docs.push(doc)
+    ids.push(doc.id)
+  })
+
+  return { docs: docs, index: decodeIndex(data.index, ids) }
+}
+
+function decodeIndex (data, ids) {
+  if (!data || !data.fields) return {}
+
+  const fields = data.fields
+  const invertedIndex = data.terms.map(([term, termIndex, ...fieldRefs]) => {
+    const posting = { _index: termIndex }
+    fields.forEach((field, num) => {
+      posting[field] = {}
+      fieldRefs[num].forEach((pos) => { posting[field][ids[pos]] = {} })
+    })
+    return [term, posting]
+  })
+
+  return {
+    version: data.version,
+    fields: fields,
+    fieldVectors: data.vectors.map(([field, pos, vector]) => [
+      `${fields[field]}/${ids[pos]}`, vector
+    ]),
+    invertedIndex: invertedIndex,
+    pipeline: data.pipeline,
+  }
+}
+
+globalThis.SearchData = { load: load, decode: decode }
+})()
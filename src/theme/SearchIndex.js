@@ -0,0 +1,168 @@
+(function(){
+/** Client of a sharded search index, written with `Docs(search_shards=True)`.
+ * Only the shards with the terms of each query are downloaded, and only the
+ * docs of the results that are displayed. Requires lunr.js.
+ *
+ *   const index = new SearchIndex("/static/search-en/")
+ *   const results = await index.search("install")
+ *   const docs = await index.getDocs(results.slice(0, 10).map((r) => r.ref))
+ */
+
+const MANIFEST = "manifest.json"
+const OTHER_DOCS_SHARD = "other"
+
+function fetchJSON (url) {
+  return fetch(url).then((response) => {
+    if (!response.ok) throw new Error(`${response.status} ${url}`)
+    return response.json()
+  })
+}
+
+function prefixOf (term, length) {
+  // By code points, like in Python
+  return Array.from(term).slice(0, length).join("")
+}
+
+class SearchIndex {
+  constructor (url) {
+    this.url = url.endsWith("/") ? url : `${url}/`
+    this.manifest = null
+    this.pipeline = null
+    // term: {field: {ref: score}}
+    this.terms = Object.create(null)
+    this.termShards = new Map()
+    this.docShards = new Map()
+    this.index = null
+    this.indexedShards = 0
+    this.loadedShards = 0
+  }
+
+  async getManifest () {
+    if (!this.manifest) {
+      this.manifest = fetchJSON(this.url + MANIFEST).then((manifest) => {
+        this.pipeline = lunr.Pipeline.load(manifest.pipeline)
+        return manifest
+      })
+    }
+    return this.manifest
+  }
+
+  async search (query) {
+    const manifest = await this.getManifest()
+    const shards = this.getTermShards(manifest, query)
+    await Promise.all(shards.map((num) => this.loadTermShard(num)))
+
+    if (!this.index || this.indexedShards !== this.loadedShards) {
+      this.indexedShards = this.loadedShards
+      this.index = this.buildIndex(manifest)
+    }
+    return this.index.search(query)
+  }
+
+  async getDocs (refs) {
+    const manifest = await this.getManifest()
+    const shards = new Set(refs.map((ref) => this.getDocsShard(manifest, ref)))
+    const docs = Object.assign({}, ...await Promise.all(
+      Array.from(shards).map((num) => this.loadDocsShard(num))
+    ))
+    return refs.map((ref) => docs[ref])
+  }
+
+  /* Private */
+
+  getTermShards (manifest, query) {
+    const length = manifest.prefix_length
+    const allPrefixes = Object.keys(manifest.prefixes)
+    const parsed = new lunr.Query(manifest.fields)
+    new lunr.QueryParser(query, parsed).parse()
+
+    const shards = new Set()
+    parsed.clauses.forEach((clause) => {
+      const terms = clause.usePipeline
+        ? this.pipeline.runString(clause.term, { fields: clause.fields })
+        : [clause.term]
+
+      terms.forEach((term) => {
+        // Fuzzy matches can change any character of the term
+        const start = clause.editDistance ? "" : term.split(lunr.Query.wildcard)[0]
+        const prefix = prefixOf(start, length)
+        if (Array.from(prefix).length === length) {
+          if (Object.prototype.hasOwnProperty.call(manifest.prefixes, prefix)) {
+            shards.add(manifest.prefixes[prefix])
+          }
+          return
+        }
+        allPrefixes.forEach((key) => {
+          if (key.startsWith(prefix)) shards.add(manifest.prefixes[key])
+        })
+      })
+    })
+    return Array.from(shards)
+  }
+
+  getDocsShard (manifest, ref) {
+    if (/^[0-9]+$/.test(ref)) {
+      return String(Math.floor((Number(ref) - 1) / manifest.docs_per_shard))
+    }
+    return OTHER_DOCS_SHARD
+  }
+
+  loadTermShard (num) {
+    if (!this.termShards.has(num)) {
+      this.termShards.set(num, fetchJSON(`${this.url}terms-${num}.json`).then((data) => {
+        data.terms.forEach(([term, scores]) => { this.terms[term] = scores })
+        this.loadedShards += 1
+      }))
+    }
+    return this.termShards.get(num)
+  }
+
+  loadDocsShard (num) {
+    if (!this.docShards.has(num)) {
+      this.docShards.set(num, fetchJSON(`${this.url}docs-${num}.json`).then((data) => data.docs))
+    }
+    return this.docShards.get(num)
+  }
+
+  buildIndex (manifest) {
+    /* Build a lunr index of the loaded terms only. Because lunr normalizes
+    the similarity by the magnitude of the query vector, the partial vectors
+    of the docs give the same scores than the full ones. */
+    const invertedIndex = Object.create(null)
+    const vectors = Object.create(null)
+    const terms = Object.keys(this.terms).sort()
+
+    terms.forEach((term, termIndex) => {
+      const scores = this.terms[term]
+      const posting = Object.create(null)
+      posting._index = termIndex
+      manifest.fields.forEach((field) => {
+        posting[field] = Object.create(null)
+        const refs = scores[field] || {}
+        Object.keys(refs).forEach((ref) => {
+          posting[field][ref] = Object.create(null)
+          const fieldRef = `${field}/${ref}`
+          vectors[fieldRef] = vectors[fieldRef] || []
+          vectors[fieldRef].push(termIndex, refs[ref])
+        })
+      })
+      invertedIndex[term] = posting
+    })
+
+    const fieldVectors = Object.create(null)
+    Object.keys(vectors).forEach((fieldRef) => {
+      fieldVectors[fieldRef] = new lunr.Vector(vectors[fieldRef])
+    })
+
+    return new lunr.Index({
+      invertedIndex: invertedIndex,
+      fieldVectors: fieldVectors,
+      tokenSet: lunr.TokenSet.fromArray(terms),
+      fields: manifest.fields,
+      pipeline: this.pipeline,
+    })
+  }
+}
+
+globalThis.SearchIndex = SearchIndex
+})()
@@ -0,0 +1,52 @@
+import json
+
+from claydocs.indexer import compact
+from claydocs.indexer.lunr import build_index
+from claydocs.indexer.text_extractor import extract_docs, make_doc
+
+
+HTML = """<!--startpage-->
+<p>Intro of the page</p>
+<h2 id="install">Install</h2><p>Run pip install</p>
+<h2 id="usage">Usage</h2><p>Import it</p>
+<!--endpage-->"""
+
+
+def make_data():
+    docs = extract_docs(HTML, loc="/guide", title="Guide")
+    docs += extract_docs(HTML, loc="/more", title="More")
+    docs.append(make_doc(id="tags-/guide", title="Guide", raw="#python", loc="/guide"))
+    for num, doc in enumerate(docs, 1):
+        if not doc["id"].startswith("tags-"):
+            doc["id"] = str(num)
+            del doc["raw"]
+    return docs, build_index(docs)
+
+
+def test_encode_decode():
+    docs, index = make_data()
+    data = compact.encode(docs, index)
+    data = json.loads(json.dumps(data))
+    assert compact.decode(data) == {"docs": docs, "index": index}
+
+
+def test_encode_page_table():
+    docs, index = make_data()
+    data = compact.encode(docs, index)
+
+    strings = data["strings"]
+    assert [[strings[url], strings[title]] for url, title in data["pages"]] == [
+        ["/guide", "Guide"],
+        ["/more", "More"],
+    ]
+    assert data["docs"]["id"] == [1, 2, 3, 4, 5, 6, "tags-/guide"]
+    assert data["docs"]["page"] == [0, 0, 0, 1, 1, 1, 0]
+    # The titles of the sections are interned
+    assert strings.count("Install") == 1
+    assert data["docs"]["title"][0] is None
+    assert data["docs"]["raw"] == [None] * 6 + ["#python"]
+
+
+def test_encode_empty_index():
+    data = compact.encode([], {})
+    assert compact.decode(data) == {"docs": [], "index": {}}
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from claydocs import Docs
+
+
+PAGE = """<p>{{ page.url }}</p>{{ pause() }}<p>{{ page.url }}</p>"""
+
+
+def test_render_in_threads(tmp_path):
+    (tmp_path / "content").mkdir()
+    for name in ("a", "b", "c", "d"):
+        (tmp_path / "content" / f"{name}.md").write_text(f"# {name}")
+    (tmp_path / "components").mkdir()
+    (tmp_path / "components" / "Page.jinja").write_text(PAGE)
+
+    docs = Docs(
+        ["a.md", "b.md", "c.md", "d.md"],
+        root=tmp_path,
+        cache=False,
+        search=False,
+        globals={"pause": lambda: time.sleep(0.01) or ""},
+    )
+    docs.add_folder(tmp_path / "components")
+
+    urls = ["/a", "/b", "/c", "/d"] * 4
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        htmls = list(executor.map(docs.render, urls))
+
+    for url, html in zip(urls, htmls):
+        assert html == f"<p>{url}</p><p>{url}</p>"
+
+
+def test_refresh_forgets_deleted_files(tmp_path):
+    (tmp_path / "content").mkdir()
+    for name in ("a", "b"):
+        (tmp_path / "content" / f"{name}.md").write_text(f"# {name}")
+    (tmp_path / "components").mkdir()
+    (tmp_path / "components" / "Page.jinja").write_text("{{ content }}")
+
+    docs = Docs(["a.md", "b.md"], root=tmp_path, cache=False, search=False)
+    docs.add_folder(tmp_path / "components")
+    docs.render("/a")
+    docs.render("/b")
+    assert len(docs.md_cache._entries) == 2
+
+    path = tmp_path / "content" / "b.md"
+    path.unlink()
+    docs.refresh([str(path)])
+    assert list(docs.md_cache._entries) == [str(tmp_path.resolve() / "content" / "a.md")]
@@ -0,0 +1,82 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import jinja2
+import jinjax
+
+from claydocs.fragment_cache import FragmentCache
+
+
+THEME = Path(__file__).parent.parent / "src" / "theme"
+
+
+def get_env():
+    return jinja2.Environment(
+        extensions=["claydocs.fragment_cache.FragmentCacheExtension"],
+    )
+
+
+def test_cache_block():
+    env = get_env()
+    tmpl = env.from_string("{% cache 'sidebar', lang %}{{ lang }}-{{ n }}{% endcache %}")
+
+    assert tmpl.render(lang="en", n=1) == "en-1"
+    assert tmpl.render(lang="en", n=2) == "en-1"
+    assert tmpl.render(lang="es", n=3) == "es-3"
+
+    env.fragment_cache.clear()
+    assert tmpl.render(lang="en", n=4) == "en-4"
+
+
+def test_cache_key_of_template_and_lang():
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader({
+            "a.html": "{% cache 'nav' %}a-{{ n }}{% endcache %}",
+            "b.html": "{% cache 'nav' %}b-{{ n }}{% endcache %}",
+        }),
+        extensions=["claydocs.fragment_cache.FragmentCacheExtension"],
+    )
+    en, es = SimpleNamespace(lang="en"), SimpleNamespace(lang="es")
+
+    assert env.get_template("a.html").render(n=1, page=en) == "a-1"
+    assert env.get_template("b.html").render(n=2, page=en) == "b-2"
+    assert env.get_template("a.html").render(n=3, page=en) == "a-1"
+    assert env.get_template("a.html").render(n=4, page=es) == "a-4"
+
+
+def test_lru():
+    cache = FragmentCache(max_size=2)
+    cache.set(("a",), "A")
+    cache.set(("b",), "B")
+    assert cache.get(("a",)) == "A"
+    cache.set(("c",), "C")
+
+    assert len(cache) == 2
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == "A"
+    assert cache.get(("c",)) == "C"
+
+
+def test_theme_lang_switch(tmp_path):
+    catalog = jinjax.Catalog(extensions=["claydocs.fragment_cache.FragmentCacheExtension"])
+    (tmp_path / "Dropdown.jinja").write_text("<div>{{ content }}</div>")
+    catalog.add_folder(tmp_path)
+    catalog.add_folder(THEME)
+    languages = {
+        "en": SimpleNamespace(code="en", name="English", url="/en/"),
+        "es": SimpleNamespace(code="es", name="Español", url="/es/"),
+    }
+    catalog.jinja_env.globals["page"] = SimpleNamespace(lang="en")
+
+    html = catalog.render("LangSwitch", languages=languages)
+    assert 'href="/es/"' in html
+    assert len(catalog.jinja_env.fragment_cache) == 1
+
+    # From the cache
+    languages["es"].url = "/changed/"
+    assert catalog.render("LangSwitch", languages=languages) == html
+
+    catalog.jinja_env.globals["page"] = SimpleNamespace(lang="es")
+    html = catalog.render("LangSwitch", languages=languages)
+    assert 'href="/en/"' in html
+    assert len(catalog.jinja_env.fragment_cache) == 2
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+
+# Modules that must be imported only by the commands that need them
+LAZY_MODULES = (
+    "bs4",
+    "docstring_parser",
+    "html2image",
+    "image_processing",
+    "markdown",
+    "pygments",
+    "pymdownx",
+    "watchdog",
+)
+
+
+def test_lazy_imports():
+    code = (
+        "import sys, claydocs;"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,93 @@
+from claydocs.indexer import indexer as indexer_module
+from claydocs.indexer import Indexer
+from claydocs.indexer.search_cache import SEARCH_CACHE
+from claydocs.nav import Page
+
+
+LAYOUT = "<html><head>{head}</head><body><!--startpage-->{content}<!--endpage--></body></html>"
+
+
+def make_site(contents):
+    pages = [
+        Page(lang="en", url=f"/{name}", title=name.title(), meta={"tags": ["t"]})
+        for name in contents
+    ]
+
+    def render(url):
+        content = contents[url.strip("/")]
+        return LAYOUT.format(head=f"<link href='docs.css?v={render.calls}'>", content=content)
+
+    render.calls = 0
+    return pages, render
+
+
+def count_extractions(monkeypatch):
+    extracted = []
+    extract_docs_chunk = indexer_module.extract_docs_chunk
+
+    def spy(chunk):
+        extracted.extend(loc for _, loc, _ in chunk)
+        return extract_docs_chunk(chunk)
+
+    monkeypatch.setattr(indexer_module, "extract_docs_chunk", spy)
+    return extracted
+
+
+def test_index_uses_cache(tmp_path, monkeypatch):
+    extracted = count_extractions(monkeypatch)
+    contents = {
+        "a": "<h2 id='x'>Hello</h2><p>Running dogs</p>",
+        "b": "<p>Sleeping cats</p>",
+    }
+    pages, render = make_site(contents)
+    cache_path = tmp_path / SEARCH_CACHE
+
+    data = Indexer(tmp_path, render, cache_path=cache_path).index(pages)
+    assert extracted == ["/a", "/b"]
+    assert cache_path.is_file()
+
+    # The layout changes, but not the content of the pages
+    render.calls += 1
+    extracted.clear()
+    data2 = Indexer(tmp_path, render, cache_path=cache_path).index(pages)
+    assert extracted == []
+    assert data2 == data
+
+
+def test_index_only_extract_changed_pages(tmp_path, monkeypatch):
+    extracted = count_extractions(monkeypatch)
+    contents = {
+        "a": "<p>Running dogs</p>",
+        "b": "<p>Sleeping cats</p>",
+    }
+    pages, render = make_site(contents)
+    cache_path = tmp_path / SEARCH_CACHE
+    Indexer(tmp_path, render, cache_path=cache_path).index(pages)
+
+    contents["b"] = "<p>Eating mice</p>"
+    extracted.clear()
+    data = Indexer(tmp_path, render, cache_path=cache_path).index(pages)
+    assert extracted == ["/b"]
+
+    # Same result as indexing without a cache
+    assert data == Indexer(tmp_path, render).index(pages)
+    terms = " ".join(term for term, _ in data["en"]["index"]["invertedIndex"])
+    assert "mice" in terms
+    assert "cat" not in terms
+
+
+def test_index_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(indexer_module, "EXTRACT_CHUNK_SIZE", 3)
+    monkeypatch.setattr(indexer_module, "PARALLEL_MIN_PAGES", 4)
+    contents = {f"p{num}": f"<h2 id='x'>Title {num}</h2><p>Page {num}</p>" for num in range(10)}
+    pages, render = make_site(contents)
+
+    indexer = Indexer(tmp_path, render)
+    indexer.parallel = True
+    data = indexer.index(pages)
+    assert data == Indexer(tmp_path, render, parallel=False).index(pages)
+
+    docs = data["en"]["docs"]
+    assert [doc["loc"] for doc in docs[::2]] == [f"/p{num}#x" for num in range(10)]
+    assert [doc["id"] for doc in docs[::2]] == [str(num + 1) for num in range(10)]
+    assert docs[1]["id"] == "tags-/p0"
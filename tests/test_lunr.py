@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from claydocs.indexer import lunr
+from claydocs.indexer.indexer import index_lang
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_build_index_like_lunrjs():
+    # `lunr-search-en.json` was generated by lunr.js 2.3.9 from `lunr-docs-en.json`
+    docs = json.loads((FIXTURES / "lunr-docs-en.json").read_text())
+    expected = (FIXTURES / "lunr-search-en.json").read_text()
+
+    index = lunr.build_index(docs, "en")
+    assert json.dumps(index, separators=(",", ":"), ensure_ascii=False) == expected
+
+
+@pytest.mark.parametrize(
+    "word, stem",
+    [
+        ("caresses", "caress"),
+        ("ponies", "poni"),
+        ("agreed", "agre"),
+        ("hopping", "hop"),
+        ("filing", "file"),
+        ("happy", "happi"),
+        ("relational", "relat"),
+        ("generalizations", "gener"),
+        ("yelling", "yell"),
+        ("controll", "control"),
+        ("by", "by"),
+    ],
+)
+def test_stemmer(word, stem):
+    assert lunr.stemmer(word) == stem
+
+
+def test_tokenize():
+    assert lunr.tokenize("Hello-World foo  bar ") == ["hello", "world", "foo", "bar"]
+    assert lunr.tokenize(None) == []
+    assert lunr.tokenize("") == []
+
+
+def test_english_pipeline():
+    tokens = lunr.tokenize("The (Running) of the ... bulls")
+    assert lunr.english_pipeline(tokens) == ["run", "", "bull"]
+
+
+def test_neutral_pipeline():
+    index = lunr.build_index(
+        [{"id": "1", "title": "¿Canción?", "body": "Las canciones"}], "es"
+    )
+    assert index["pipeline"] == []
+    assert [term for term, _ in index["invertedIndex"]] == ["canciones", "canción", "las"]
+
+
+def test_js_key_order():
+    index = lunr.build_index([
+        {"id": "tags-/faq", "title": "Foo", "body": ""},
+        {"id": "10", "title": "Foo", "body": ""},
+        {"id": "2", "title": "Foo", "body": ""},
+    ])
+    posting = dict(index["invertedIndex"])["foo"]
+    assert list(posting["title"]) == ["2", "10", "tags-/faq"]
+    assert [ref for ref, _ in index["fieldVectors"]] == [
+        "title/tags-/faq",
+        "body/tags-/faq",
+        "title/10",
+        "body/10",
+        "title/2",
+        "body/2",
+    ]
+
+
+def test_index_lang_without_node(tmp_path, monkeypatch):
+    monkeypatch.setattr("shutil.which", lambda cmd: None)
+    (tmp_path / "indexer.js").write_text("")
+    docs = [{"id": "1", "title": "Hola", "body": "Mundo"}]
+    index, _ = index_lang(tmp_path, "es", docs)
+    assert index == lunr.build_index(docs, "es")
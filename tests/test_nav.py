@@ -1,4 +1,18 @@
-from claydocs.nav import Nav
+from pathlib import Path
+
+import jinjax
+import pytest
+
+from claydocs.exceptions import InvalidNav
+from claydocs.nav import (
+    DEFAULT_IGNORE,
+    NULL_PAGE,
+    ROUTE_REDIRECT,
+    Nav,
+    get_pages_in_folder,
+)
+
+THEME = Path(__file__).parent.parent / "src" / "theme"
 
 
 def test_toc():
@@ -97,3 +111,265 @@ def test_prev():
     assert nav._get_prev("3") == ("a", "/2", )
     assert nav._get_prev("2") == ("", "/1", )
     assert nav._get_prev("1") == ("", )
+
+
+def make_content(folder, *names):
+    for name in names:
+        filepath = folder / name
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text(f"# {name.removesuffix('.md').title()}")
+
+
+def test_view(tmp_path):
+    make_content(tmp_path, "1.md", "2.md", "3.md", "4.md", "5.md", "6.md")
+    nav = Nav(
+        tmp_path,
+        [
+            "1.md",
+            ("a", [
+                "2.md",
+                ("b", [
+                    "3.md",
+                    ("c", [
+                        "4.md",
+                    ]),
+                ]),
+                "5.md",
+            ]),
+            "6.md",
+        ]
+    )
+    view = nav.asdict("en")
+    assert view is nav.asdict("en")
+
+    assert view["flat_toc"] == (
+        ("/1", "1", 0),
+        (None, "a", 0),
+        ("/2", "2", 1),
+        (None, "b", 1),
+        ("/3", "3", 2),
+        (None, "c", 2),
+        ("/4", "4", 3),
+        ("/5", "5", 1),
+        ("/6", "6", 0),
+    )
+    assert view["ancestors"]["/1"] == ()
+    assert view["ancestors"]["/4"] == ("a", "b", "c")
+    assert view["ancestors"]["/5"] == ("a",)
+    assert view["breadcrumbs"]["/4"] == (
+        ("/2", "a"),
+        ("/3", "b"),
+        ("/4", "c"),
+        ("/4", "4"),
+    )
+    assert view["sections"] == {
+        1: (1, 5),
+        3: (2, 4),
+        5: (3, 4),
+    }
+    assert view["urls"] == ("/1", "/2", "/3", "/4", "/5", "/6")
+    assert view["toc"][1] == (None, "a", (
+        ("/2", "2", None),
+        (None, "b", (("/3", "3", None), (None, "c", (("/4", "4", None),)))),
+        ("/5", "5", None),
+    ))
+    with pytest.raises(TypeError):
+        view["ancestors"]["/1"] = ("x",)
+    with pytest.raises(TypeError):
+        view["pages"]["/x"] = None
+
+
+def test_view_sections_with_the_same_title(tmp_path):
+    make_content(tmp_path, "1.md", "2.md", "3.md")
+    nav = Nav(tmp_path, [("Guide", ["1.md"]), ("More", [("Guide", ["2.md", "3.md"])])])
+    view = nav.asdict("en")
+    assert view["sections"] == {0: (0, 1), 2: (1, 3), 3: (1, 3)}
+
+
+def test_toc_component(tmp_path):
+    make_content(tmp_path, "1.md", "2.md", "3.md")
+    nav = Nav(tmp_path, ["1.md", ("a", ["2.md"]), ("b", ["3.md"])])
+    view = nav.asdict("en")
+    catalog = jinjax.Catalog()
+    catalog.add_folder(THEME)
+
+    html = catalog.render(
+        "Toc", toc=view["flat_toc"], page=nav.pages["/2"], sections=view["sections"]
+    )
+    assert html.count("<details") == html.count("</details>") == 2
+    summaries = [
+        " ".join(summary.split("</summary>")[0].split())
+        for summary in html.split("<summary")[1:]
+    ]
+    assert summaries[0].endswith("mb-2 active \"> a")
+    assert summaries[1].endswith("mb-2 \"> b")
+
+
+def test_update_page(tmp_path):
+    make_content(tmp_path, "1.md", "2.md", "3.md")
+    nav = Nav(tmp_path, ["1.md", ("a", ["2.md"]), "3.md"])
+    page1, page2, page3 = nav.pages["/1"], nav.pages["/2"], nav.pages["/3"]
+
+    (tmp_path / "2.md").write_text("---\ntitle: Two\nslug: two\n---\nLorem")
+    assert nav.update_page("2.md")
+    assert nav.urls["en"] == ["/1", "/two", "/3"]
+    assert nav.pages["/two"] is page2
+    assert nav.get_file_page("2.md") is page2
+    assert page2.title == "Two"
+    assert page1.next_page is page2
+    assert nav.toc["en"][1] == [None, "a", [["/two", "Two", None]]]
+    assert nav.asdict("en")["breadcrumbs"]["/two"] == (("/two", "a"), ("/two", "Two"))
+
+    (tmp_path / "2.md").unlink()
+    assert nav.update_page("2.md")
+    assert nav.urls["en"] == ["/1", "/3"]
+    assert "/two" not in nav.pages
+    assert page3.index == 1
+    assert page1.next_page is page3
+    assert page3.prev_page is page1
+    assert nav.toc["en"][1] == [None, "a", []]
+    assert nav.get_file_page("2.md") is None
+
+    make_content(tmp_path, "2.md")
+    assert nav.update_page("2.md")
+    assert nav.urls["en"] == ["/1", "/2", "/3"]
+    assert page2.index == 1
+    assert page3.index == 2
+    assert page1.next_page is page2
+    assert page2.prev_page is page1
+    assert page2.next_page is page3
+    assert page3.prev_page is page2
+    assert nav.toc["en"][1] == [None, "a", [["/2", "2", None]]]
+
+    assert not nav.update_page("4.md")
+
+
+def test_update_page_same_url(tmp_path, caplog):
+    make_content(tmp_path, "1.md", "2.md")
+    nav = Nav(tmp_path, ["1.md", "2.md"])
+    page1, page2 = nav.pages["/1"], nav.pages["/2"]
+
+    (tmp_path / "2.md").write_text("---\nslug: '1'\n---\nLorem")
+    assert nav.update_page("2.md")
+    assert "has the same URL" in caplog.text
+    assert nav.pages["/1"] is page1
+    assert nav.pages["/2"] is page2
+    assert nav.get_page("/1") is page1
+    assert nav.urls["en"] == ["/1", "/2"]
+
+    (tmp_path / "2.md").unlink()
+    assert nav.update_page("2.md")
+    (tmp_path / "2.md").write_text("---\nslug: '1'\n---\nLorem")
+    assert nav.update_page("2.md")
+    assert nav.get_file_page("2.md") is None
+    assert nav.get_page("/1") is page1
+
+
+def test_same_url(tmp_path):
+    make_content(tmp_path, "1.md", "2.md")
+    (tmp_path / "2.md").write_text("---\nslug: '1'\n---\nLorem")
+    with pytest.raises(InvalidNav):
+        Nav(tmp_path, ["1.md", "2.md"])
+
+
+def test_null_page(tmp_path):
+    make_content(tmp_path, "1.md", "2.md")
+    nav = Nav(tmp_path, ["1.md", "2.md"])
+    page1, page2 = nav.pages["/1"], nav.pages["/2"]
+
+    assert not hasattr(page1, "__dict__")
+    assert page1.prev_page is NULL_PAGE
+    assert page2.next_page is NULL_PAGE
+    assert not NULL_PAGE
+    assert NULL_PAGE.url == ""
+    with pytest.raises(AttributeError):
+        NULL_PAGE.title = "Nope"
+
+
+def test_routes(tmp_path):
+    make_content(tmp_path, "index.md", "faq.md", "guide/index.md")
+    nav = Nav(tmp_path, ["index.md", "faq.md", "guide/index.md"])
+    home, faq, guide = nav.pages["/"], nav.pages["/faq"], nav.pages["/guide/"]
+
+    assert nav.get_page("/") is home
+    assert nav.get_page("") is home
+    assert nav.get_page("/faq") is faq
+    assert nav.get_page("/faq/") is faq
+    assert nav.get_page("/guide") is guide
+    assert nav.get_page("/guide/") is guide
+    assert nav.get_page("/nope") is None
+
+    assert nav.get_route("/index") == (home, "redirect", "/")
+    assert nav.get_route("/guide/index") == (guide, "redirect", "/guide/")
+    assert nav.get_route("/faq/og-card.png") == (faq, "social", "")
+    assert nav.get_page("/faq/og-card.png") is None
+    assert nav.get_route("/guide/Index") == (guide, "redirect", "/guide/")
+    assert nav.get_route("/INDEX/") == (home, "redirect", "/")
+    assert nav.get_route("/nope/index") is None
+
+
+def test_routes_with_and_without_slash(tmp_path):
+    make_content(tmp_path, "x.md", "x/index.md", "y.md")
+    nav = Nav(tmp_path, ["x/index.md", "x.md", "y.md"])
+    x, x_folder = nav.pages["/x"], nav.pages["/x/"]
+
+    assert nav.get_page("/x") is x
+    assert nav.get_page("/x/") is x_folder
+    for url in ("/x/index", "/x/index/", "/x/INDEX"):
+        route = nav.get_route(url)
+        assert route.kind == ROUTE_REDIRECT
+        assert route.redirect == "/x/"
+
+    # Whatever the order of the pages
+    nav = Nav(tmp_path, ["x.md", "x/index.md", "y.md"])
+    x, x_folder = nav.pages["/x"], nav.pages["/x/"]
+    assert nav.get_route("/x/index").redirect == "/x/"
+    assert nav.get_route("/x/index/").redirect == "/x/"
+
+    # The page of "/x" is removed, so "/x/" takes its place
+    (tmp_path / "x.md").unlink()
+    assert nav.update_page("x.md")
+    assert nav.get_page("/x") is x_folder
+    assert nav.get_page("/x/") is x_folder
+
+    make_content(tmp_path, "x.md")
+    assert nav.update_page("x.md")
+    assert nav.get_page("/x") is x
+    assert nav.get_page("/x/") is x_folder
+    assert nav.get_route("/x/index").redirect == "/x/"
+
+
+def test_get_pages_in_folder(tmp_path):
+    make_content(
+        tmp_path,
+        "faq.md",
+        "index.md",
+        "guide/index.md",
+        "guide/arguments.md",
+        "guide/extra/more.md",
+        "node_modules/lib/readme.md",
+        ".hidden/secret.md",
+        "drafts/wip.md",
+    )
+    (tmp_path / "logo.png").write_text("")
+    expected = [
+        "index.md",
+        ["drafts", [
+            "drafts/wip.md",
+        ]],
+        "faq.md",
+        ["guide", [
+            "guide/arguments.md",
+            ["extra", ["guide/extra/more.md"]],
+            "guide/index.md",
+        ]],
+    ]
+
+    assert get_pages_in_folder(tmp_path) == expected
+    assert get_pages_in_folder(tmp_path, parallel=True) == expected
+    ignore = [*DEFAULT_IGNORE, "drafts"]
+    assert get_pages_in_folder(tmp_path, ignore=ignore) == [expected[0], *expected[2:]]
+    ignore = [*DEFAULT_IGNORE, "guide/extra"]
+    assert get_pages_in_folder(tmp_path, ignore=ignore)[-1] == [
+        "guide", ["guide/arguments.md", "guide/index.md"]
+    ]
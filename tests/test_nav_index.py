@@ -0,0 +1,44 @@
+import json
+
+from claydocs.nav_index import NavIndex, read_page_header
+
+
+def test_read_page_header(tmp_path):
+    filepath = tmp_path / "page.md"
+
+    filepath.write_text("---\ntitle: Hello\nslug: hi\n---\n# Hi")
+    assert read_page_header(filepath) == ("Hello", {"slug": "hi"})
+
+    filepath.write_text("---\ndescription: Lorem\n---\n\nIntro\n# Hi\n\nipsum")
+    assert read_page_header(filepath) == ("Hi", {"description": "Lorem"})
+
+    filepath.write_text("\n<h1>Hi</h1>\nLorem ipsum")
+    assert read_page_header(filepath) == ("Hi", {})
+
+    filepath.write_text("Lorem ipsum")
+    assert read_page_header(filepath) == ("", {})
+
+
+def test_nav_index(tmp_path):
+    content = tmp_path / "content"
+    content.mkdir()
+    (content / "a.md").write_text("# A")
+    (content / "b.md").write_text("---\ntitle: B\n---\nLorem ipsum")
+    index_path = tmp_path / "nav-index.json"
+
+    index = NavIndex(index_path)
+    headers = index.get_headers(content, ["a.md", "b.md"])
+    assert headers == {"a.md": ("A", {}), "b.md": ("B", {})}
+
+    data = json.loads(index_path.read_text())
+    assert set(data["entries"]) == {"a.md", "b.md"}
+
+    # The unchanged files are not read again
+    data["entries"]["a.md"]["title"] = "Cached"
+    index_path.write_text(json.dumps(data))
+    index = NavIndex(index_path)
+    headers = index.get_headers(content, ["a.md"])
+    assert headers == {"a.md": ("Cached", {})}
+
+    data = json.loads(index_path.read_text())
+    assert set(data["entries"]) == {"a.md"}
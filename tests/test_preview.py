@@ -0,0 +1,157 @@
+import gzip
+import http.client
+import socket
+
+import pytest
+
+from claydocs.http_server import AsyncHTTPServer
+from claydocs.preview import PreviewServer
+
+
+HTML = "<html><body><h1>Hello</h1></body></html>"
+JS = "console.log('Hello world');\n" * 100
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "index.html").write_text(HTML)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "index.html").write_text(HTML)
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "app.js").write_text(JS)
+    (tmp_path / "static" / "app.js.gz").write_bytes(gzip.compress(JS.encode()))
+    (tmp_path / "static" / "data.gz").write_bytes(b"data")
+
+    server = PreviewServer(tmp_path, host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def request(server, path, method="GET", conn=None, headers=None):
+    conn = conn or http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_index(server):
+    assert set(server.files) == {
+        "/",
+        "/index.html",
+        "/docs/",
+        "/docs/index.html",
+        "/static/app.js",
+        "/static/data.gz",
+    }
+    assert list(server.files["/static/app.js"].variants) == ["gzip"]
+
+
+def test_get(server):
+    response, body = request(server, "/docs/")
+    assert response.status == 200
+    assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert body == HTML.encode()
+
+
+def test_head(server):
+    response, body = request(server, "/", method="HEAD")
+    assert response.status == 200
+    assert int(response.headers["Content-Length"]) == len(HTML)
+    assert body == b""
+
+
+def test_redirect_to_folder(server):
+    response, _ = request(server, "/docs")
+    assert response.status == 301
+    assert response.headers["Location"] == "/docs/"
+
+    response, _ = request(server, "/docs?q=hello%20world&page=2")
+    assert response.status == 301
+    assert response.headers["Location"] == "/docs/?q=hello%20world&page=2"
+
+
+def test_not_found(server):
+    response, _ = request(server, "/nope")
+    assert response.status == 404
+    response, _ = request(server, "/../tests/test_preview.py")
+    assert response.status == 404
+
+
+def test_method_not_allowed(server):
+    response, _ = request(server, "/", method="POST")
+    assert response.status == 405
+    assert response.headers["Allow"] == "GET, HEAD"
+
+
+def test_precompressed(server):
+    response, body = request(server, "/static/app.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(body) == JS.encode()
+
+    response, body = request(server, "/static/app.js")
+    assert "Content-Encoding" not in response.headers
+    assert body == JS.encode()
+
+
+def test_conditional_get(server):
+    response, _ = request(server, "/static/app.js")
+    etag = response.headers["ETag"]
+    response, body = request(server, "/static/app.js", headers={"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+
+
+def test_range(server):
+    response, body = request(server, "/static/app.js", headers={"Range": "bytes=0-6"})
+    assert response.status == 206
+    assert response.headers["Content-Range"] == f"bytes 0-6/{len(JS)}"
+    assert body == b"console"
+
+    response, body = request(server, "/static/app.js", headers={"Range": "bytes=-3"})
+    assert body == b");\n"
+
+    response, _ = request(server, "/static/app.js", headers={"Range": "bytes=99999-"})
+    assert response.status == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(JS)}"
+
+
+def test_if_range(server):
+    headers = {"Range": "bytes=0-6", "If-Range": '"changed"'}
+    response, body = request(server, "/static/app.js", headers=headers)
+    assert response.status == 200
+    assert body == JS.encode()
+
+
+def test_keep_alive(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    for path in ("/", "/static/app.js", "/nope", "/docs/"):
+        response, _ = request(server, path, conn=conn)
+    assert response.status == 200
+    assert not response.will_close
+
+
+def send_raw(server, data):
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as conn:
+        conn.sendall(data)
+        return conn.makefile("rb").read()
+
+
+def test_bad_requests(server):
+    response = send_raw(server, b"GET / HTTP/1.1\r\nContent-Length: nope\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+
+    # The chunked body would be read as the next request
+    response = send_raw(
+        server,
+        b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"1d\r\nGET /nope HTTP/1.1\r\nHost: x\r\n\r\n\r\n0\r\n\r\n",
+    )
+    assert response == b"HTTP/1.1 411 Length Required\r\nConnection: close\r\n\r\n"
+
+
+def test_abstract_server():
+    with pytest.raises(TypeError):
+        AsyncHTTPServer(port=0)
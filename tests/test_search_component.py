@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from claydocs import Docs
+
+
+THEME = Path(__file__).parent.parent / "src" / "theme"
+PAGE = """<html><head>{{ catalog.render_assets() }}</head>
+<body><Search />{{ content }}</body></html>"""
+
+
+def make_docs(root, **kwargs):
+    (root / "content").mkdir()
+    (root / "content" / "index.md").write_text("# Hello")
+    (root / "components").mkdir()
+    (root / "components" / "SearchPage.jinja").write_text(PAGE)
+
+    docs = Docs(
+        ["index.md"], root=root, cache=False, default_component="SearchPage", **kwargs
+    )
+    docs.add_folder(THEME)
+    docs.add_folder(root / "components")
+    return docs
+
+
+def test_search_shards(tmp_path):
+    docs = make_docs(tmp_path, search_shards=True)
+    html = docs.render("/")
+    assert '<script type="module" src="/static/components/SearchIndex.js">' in html
+    assert '<script type="module" src="/static/components/Search.js">' in html
+    assert 'data-search-format="shards"' in html
+    assert 'data-search-url="/static/search-en/"' in html
+    # Loaded only when the search box is used
+    assert 'data-lunr-url="https://unpkg.com/lunr@2.3.9/lunr.min.js"' in html
+    assert "lunr.min.js\"></script>" not in html
+
+
+def test_search_compact(tmp_path):
+    docs = make_docs(tmp_path, search_compact=True, search_gzip=True)
+    html = docs.render("/")
+    assert '<script type="module" src="/static/components/SearchData.js">' in html
+    assert '<script type="module" src="/static/components/Search.js">' in html
+    assert 'data-search-format="json"' in html
+    assert 'data-search-url="/static/search-en.json"' in html
+
+
+def test_search_disabled(tmp_path):
+    docs = make_docs(tmp_path, search=False)
+    html = docs.render("/")
+    assert "data-search-url" not in html
@@ -0,0 +1,416 @@
+import gzip
+import http.client
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from claydocs import Docs
+from claydocs.server import LiveReloadServer
+from claydocs.utils import Redirect
+
+
+PAGES = {
+    "/": "<html><body><h1>Home</h1></body></html>",
+    "/big": "<html><body>{}</body></html>".format("Hello world! " * 200),
+    "/old": Redirect("/"),
+}
+
+
+def get_page(path):
+    if path == "/error":
+        raise ValueError("Oops")
+    if path == "/slow":
+        time.sleep(0.3)
+        return "<body>Slow</body>"
+    return PAGES.get(path, "")
+
+
+@pytest.fixture
+def server():
+    server = LiveReloadServer(get_page, lambda path: None, host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def request(server, path, method="GET", conn=None, headers=None):
+    conn = conn or http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_get_page(server):
+    response, body = request(server, "/")
+    assert response.status == 200
+    assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+    assert body.startswith(b"<html><body><h1>Home</h1><script>")
+    assert body.endswith(b"</script></body></html>")
+    assert b"livereload(%d)" % server.epoch in body
+
+
+def test_head(server):
+    response, body = request(server, "/", method="HEAD")
+    assert response.status == 200
+    assert body == b""
+
+
+def test_conditional_get(server):
+    response, body = request(server, "/")
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response, body = request(server, "/", headers={"If-None-Match": etag})
+    assert response.status == 304
+    assert response.headers["ETag"] == etag
+    assert body == b""
+
+    response, _ = request(server, "/", headers={"If-Modified-Since": last_modified})
+    assert response.status == 304
+
+    # Other pages changed
+    server.reload(["/other"])
+    response, _ = request(server, "/", headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    # The live reload script, or the page, could have changed
+    server.reload()
+    response, body = request(server, "/", headers={"If-None-Match": etag})
+    assert response.status == 200
+    assert response.headers["ETag"] != etag
+    assert b"livereload(%d)" % server.epoch in body
+
+
+def test_cached_page_not_copied(server):
+    request(server, "/")
+    environ = {"PATH_INFO": "/", "REQUEST_METHOD": "GET"}
+    chunks = server.application(environ, lambda status, headers: None)
+    page = server.responses["/"].body
+    assert [chunk.obj for chunk in (chunks[0], chunks[2])] == [page, page]
+    assert chunks[1] is server.script_for(server.epoch)
+    assert b"".join(chunks).endswith(b"</script></body></html>")
+
+
+def test_cached_page_head(server):
+    response, body = request(server, "/")
+    response, body = request(server, "/", method="HEAD")
+    assert response.status == 200
+    assert int(response.headers["Content-Length"]) > 0
+    assert body == b""
+
+
+def test_gzip(server):
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    response, body = request(server, "/big", headers=headers)
+    assert response.status == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) == len(body)
+    html = gzip.decompress(body)
+    assert html.startswith(b"<html><body>Hello world!")
+    assert b"livereload(%d)" % server.epoch in html
+
+    # Compressed only once
+    etag = response.headers["ETag"]
+    variant = server.responses["/big"].variants["gzip"]
+    response, same_body = request(server, "/big", headers=headers)
+    assert server.responses["/big"].variants["gzip"] is variant
+    assert same_body == body
+    assert response.headers["ETag"] == etag
+
+    response, body = request(server, "/big", headers={"If-None-Match": etag, **headers})
+    assert response.status == 304
+
+    # Not accepted by the browser
+    response, body = request(server, "/big", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] != etag
+    assert body.startswith(b"<html><body>Hello world!")
+
+    # The script of the new epoch
+    server.reload(["/big"])
+    response, body = request(server, "/big", headers=headers)
+    assert b"livereload(%d)" % server.epoch_for("/big") in gzip.decompress(body)
+
+
+def test_gzip_reloaded_while_compressed(server):
+    headers = {"Accept-Encoding": "gzip"}
+    request(server, "/big", headers=headers)
+    response = server.responses["/big"]
+    epoch = server.epoch_for("/big")
+    response.variants.clear()
+
+    # Outdated, so it is sent but not cached
+    time.sleep(0.002)
+    server.reload()
+    body = server._get_compressed_body("/big", response, epoch, "gzip")
+    assert b"livereload(%d)" % epoch in gzip.decompress(body)
+    assert response.variants == {}
+
+    response, body = request(server, "/big", headers=headers)
+    epoch = server.epoch_for("/big")
+    assert server.responses["/big"].variants["gzip"] == (epoch, body)
+
+
+def test_gzip_head(server):
+    headers = {"Accept-Encoding": "gzip"}
+    request(server, "/big")
+    response, _ = request(server, "/big", method="HEAD", headers=headers)
+    assert "Content-Encoding" not in response.headers
+    assert server.responses["/big"].variants == {}
+
+    _, body = request(server, "/big", headers=headers)
+    response, _ = request(server, "/big", method="HEAD", headers=headers)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert int(response.headers["Content-Length"]) == len(body)
+
+
+def test_small_pages_not_compressed(server):
+    response, body = request(server, "/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert body.startswith(b"<html><body><h1>Home</h1>")
+
+
+def test_page_reloaded_while_rendered(server):
+    def get_outdated_page(path):
+        time.sleep(0.002)
+        server.reload([path])
+        return "<body>Outdated</body>"
+
+    server._get_page = get_outdated_page
+    epoch = server.epoch_for("/changed")
+    response, body = request(server, "/changed")
+    assert response.status == 200
+    assert body.startswith(b"<body>Outdated<script>")
+    # The browser will ask for the page again
+    assert b"livereload(%d)" % epoch in body
+    assert server.epoch_for("/changed") > epoch
+    assert "/changed" not in server.responses
+
+    server._get_page = get_page
+    request(server, "/")
+    assert "/" in server.responses
+
+
+def test_twin_pages(tmp_path):
+    (tmp_path / "content" / "guide").mkdir(parents=True)
+    (tmp_path / "content" / "guide.md").write_text("# Guide")
+    (tmp_path / "content" / "guide" / "index.md").write_text("# Guide index")
+    (tmp_path / "content" / "intro.md").write_text("# Intro")
+    (tmp_path / "components").mkdir()
+    (tmp_path / "components" / "Page.jinja").write_text(
+        "<html><body>{{ page.filename }}</body></html>"
+    )
+    docs = Docs(
+        ["guide.md", "guide/index.md", "intro.md"],
+        root=tmp_path,
+        cache=False,
+        search=False,
+    )
+    docs.add_folder(tmp_path / "components")
+    server = LiveReloadServer(
+        docs.get_cached_page,
+        docs.refresh,
+        host="127.0.0.1",
+        port=0,
+        get_page_key=docs.get_page_key,
+    )
+    server.start()
+    try:
+        for _ in range(2):
+            _, body = request(server, "/guide")
+            assert body.startswith(b"<html><body>guide.md<script>")
+            _, body = request(server, "/guide/")
+            assert body.startswith(b"<html><body>guide/index.md<script>")
+        assert server.responses.keys() == {"/guide", "/guide/"}
+
+        # The other forms of a URL share the page
+        _, body = request(server, "/intro/")
+        assert body.startswith(b"<html><body>intro.md<script>")
+        assert server.page_key("/intro/") == "/intro"
+        assert "/intro/" not in server.responses
+
+        server.reload(["/guide/"])
+        assert server.responses.keys() == {"/guide", "/intro"}
+        assert server.epoch_for("/guide/") > server.epoch_for("/guide")
+    finally:
+        server.shutdown()
+
+
+def test_not_found(server):
+    response, body = request(server, "/nope/")
+    assert response.status == 404
+    assert body.startswith(b"/nope/index not found")
+
+
+def test_redirect(server):
+    response, _ = request(server, "/old")
+    assert response.status == 302
+    assert response.headers["Location"] == "/"
+
+
+def test_error(server):
+    response, body = request(server, "/error")
+    assert response.status == 500
+    assert b"ValueError" in body
+
+
+def test_concurrent_requests(server):
+    results = {}
+    slow = threading.Thread(
+        target=lambda: results.setdefault("slow", request(server, "/slow"))
+    )
+    slow.start()
+    time.sleep(0.1)
+    redirect, _ = request(server, "/old")
+    slow.join(5)
+
+    assert redirect.status == 302
+    response, body = results["slow"]
+    assert response.status == 200
+    assert "Location" not in response.headers
+    assert body.startswith(b"<body>Slow<script>")
+
+
+def test_keep_alive(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    for _ in range(3):
+        response, _ = request(server, "/", conn=conn)
+        assert response.status == 200
+    assert not response.will_close
+
+
+def test_livereload(server):
+    epoch = server.epoch
+    response, body = request(server, f"/livereload/{epoch - 1}/")
+    assert response.status == 200
+    assert body == b"%d" % epoch
+
+    results = []
+    waiting = threading.Thread(
+        target=lambda: results.append(request(server, f"/livereload/{epoch}/"))
+    )
+    waiting.start()
+    waiting.join(0.2)
+    assert waiting.is_alive()
+
+    server.reload()
+    waiting.join(5)
+    _, body = results[0]
+    assert int(body) == server.epoch > epoch
+
+
+def test_livereload_events(server):
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as conn:
+        conn.sendall(b"GET /livereload/events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        stream = conn.makefile("rb")
+        assert stream.readline() == b"HTTP/1.1 200 OK\r\n"
+        headers = read_event(stream)
+        assert b"Content-Type: text/event-stream" in headers
+        assert read_event(stream) == b"data: %d" % server.epoch
+
+        server.reload()
+        assert read_event(stream) == b"data: %d" % server.epoch
+
+
+def read_event(stream):
+    lines = []
+    for line in stream:
+        line = line.rstrip(b"\r\n")
+        if not line:
+            break
+        lines.append(line)
+    return b"\n".join(lines)
+
+
+def open_events(server, page):
+    conn = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    conn.sendall(
+        b"GET /livereload/events?page=%s HTTP/1.1\r\nHost: localhost\r\n\r\n" % page
+    )
+    stream = conn.makefile("rb")
+    read_event(stream)  # Status and headers
+    return conn, stream
+
+
+def test_targeted_livereload(server):
+    # "/a" and "/a/" are the same page
+    server._get_page_key = lambda url: url.rstrip("/")
+    epoch = server.epoch
+    conn_a, stream_a = open_events(server, b"/a/")
+    conn_b, stream_b = open_events(server, b"/b")
+    assert read_event(stream_a) == read_event(stream_b) == b"data: %d" % epoch
+
+    server.reload(["/a"])
+    new_epoch = server.epoch_for("/a/")
+    assert new_epoch > epoch
+    assert server.epoch_for("/b") == server.epoch == epoch
+    assert read_event(stream_a) == b"data: %d" % new_epoch
+
+    conn_b.settimeout(0.2)
+    with pytest.raises(TimeoutError):
+        read_event(stream_b)
+
+    # A polling browser of the page gets the new epoch at once
+    _, body = request(server, f"/livereload/{epoch}/?page=/a")
+    assert int(body) == new_epoch
+
+    conn_a.close()
+    conn_b.close()
+
+
+def run_refresh_loop(**kwargs):
+    batches = []
+    server = LiveReloadServer(
+        get_page, batches.append, host="127.0.0.1", port=0, **kwargs
+    )
+    server.running = True
+    loop = threading.Thread(target=server.refresh_loop)
+    loop.start()
+    return server, loop, batches
+
+
+def stop_refresh_loop(server, loop):
+    server.shutdown()
+    with server.must_refresh_cond:
+        server.must_refresh_cond.notify_all()
+    loop.join(5)
+
+
+def test_debounced_refresh(tmp_path):
+    server, loop, batches = run_refresh_loop(debounce=0.3)
+    try:
+        for name in ("b.md", "a.md", "b.md", "c.jinja"):
+            server.add_changes([name])
+            time.sleep(0.05)
+        assert batches == []
+
+        time.sleep(0.6)
+        assert batches == [["a.md", "b.md", "c.jinja"]]
+    finally:
+        stop_refresh_loop(server, loop)
+
+
+def test_watch_native(tmp_path):
+    server, loop, batches = run_refresh_loop(debounce=0.3)
+    try:
+        server.watch(tmp_path)
+        server.observer.start()
+        time.sleep(0.2)
+        for name in ("a.md", "b.md", "c.md"):
+            (tmp_path / name).write_text("Hello")
+        (tmp_path / "c.md").rename(tmp_path / "d.md")
+        (tmp_path / "a.md").read_text()
+
+        deadline = time.monotonic() + 5
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.1)
+        time.sleep(0.5)
+        assert len(batches) == 1
+        assert [Path(path).name for path in batches[0]] == ["a.md", "b.md", "c.md", "d.md"]
+    finally:
+        stop_refresh_loop(server, loop)
@@ -0,0 +1,64 @@
+import json
+
+from claydocs.indexer import shards
+from claydocs.indexer.lunr import build_index
+
+
+def make_docs():
+    docs = [
+        {"id": str(num), "title": f"Page {num}", "body": f"foo{num} bar{num} baz"}
+        for num in range(1, 6)
+    ]
+    docs.append({"id": "tags-/one", "title": "One", "body": "", "raw": "#tag"})
+    return docs
+
+
+def test_make_shards(monkeypatch):
+    monkeypatch.setattr(shards, "TERMS_PER_SHARD", 4)
+    monkeypatch.setattr(shards, "DOCS_PER_SHARD", 2)
+    docs = make_docs()
+    index = build_index(docs)
+    files = shards.make_shards(docs, index)
+
+    manifest = files[shards.MANIFEST]
+    assert manifest["fields"] == ["title", "body"]
+    assert manifest["pipeline"] == ["stemmer"]
+    assert manifest["docs_per_shard"] == 2
+
+    # All the terms of a prefix are in the same shard
+    terms = {}
+    for prefix, num in manifest["prefixes"].items():
+        shard = files[shards.TERMS_SHARD.format(num=num)]
+        shard_terms = dict(shard["terms"])
+        assert any(term.startswith(prefix) for term in shard_terms)
+        terms.update(shard_terms)
+    assert sorted(terms) == [term for term, _ in index["invertedIndex"]]
+
+    # The scores are the components of the field vectors
+    vectors = dict(index["fieldVectors"])
+    for term, posting in index["invertedIndex"]:
+        for field, refs in terms[term].items():
+            for ref, score in refs.items():
+                vector = vectors[f"{field}/{ref}"]
+                assert dict(zip(vector[::2], vector[1::2]))[posting["_index"]] == score
+
+    assert list(files["docs-0.json"]["docs"]) == ["1", "2"]
+    assert list(files["docs-2.json"]["docs"]) == ["5"]
+    assert list(files["docs-other.json"]["docs"]) == ["tags-/one"]
+
+
+def test_write_shards(tmp_path):
+    folder = tmp_path / "search-en"
+    folder.mkdir()
+    (folder / "terms-99.json").write_text("{}")
+    docs = make_docs()
+    shards.write_shards(folder, docs, build_index(docs))
+
+    assert not (folder / "terms-99.json").exists()
+    manifest = json.loads((folder / shards.MANIFEST).read_text())
+    assert manifest["version"] == shards.SHARDS_VERSION
+
+
+def test_make_shards_empty_index():
+    files = shards.make_shards([], {})
+    assert files[shards.MANIFEST]["prefixes"] == {}
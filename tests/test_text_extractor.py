@@ -0,0 +1,40 @@
+from claydocs.indexer.text_extractor import extract_docs
+
+
+def extract(html):
+    return [
+        (doc["title"], doc["body"], doc["raw"], doc["loc"])
+        for doc in extract_docs(html, loc="/guide", title="Guide")
+    ]
+
+
+def test_extract_sections():
+    html = """<!--startpage--><p>Intro  text.</p>
+<h2 id="install">Install &amp; run</h2>
+<p>Run <b>pip</b>   install -U foo.</p>
+<!--endpage--><p>Ignored</p>"""
+    assert extract(html) == [
+        ("Guide", "<p>Intro text.</p>", "Intro text", "/guide#"),
+        (
+            "Install &amp; run",
+            "<p>Run <b>pip</b> install -U foo.</p>",
+            "Run pip install -U foo",
+            "/guide#install",
+        ),
+    ]
+
+
+def test_extract_pre_and_code():
+    html = """<!--startpage--><p>Call <code>x.y_z()</code> -- now.</p>
+<pre><code>a  =  1\n.b</code></pre>"""
+    assert extract(html) == [
+        ("Guide", "<p>Call <code>x.y_z()</code> -- now.</p>", "Call x.y_z() now", "/guide#"),
+        ("Guide", "<pre><code>a  =  1\n.b</code></pre>", "a = 1 .b", "/guide#"),
+    ]
+
+
+def test_extract_text_with_chunk_separator():
+    html = "<!--startpage--><p>a\x00.b  c<em>.d</em></p>"
+    assert extract(html) == [
+        ("Guide", "<p>a\x00.b c<em>.d</em></p>", "a .b c d", "/guide#"),
+    ]
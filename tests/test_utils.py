@@ -0,0 +1,56 @@
+import os
+
+from claydocs.utils import MarkdownCache
+
+
+def test_markdown_cache(tmp_path):
+    filepath = tmp_path / "page.md"
+    filepath.write_text("---\ntitle: Hello\n---\n# Hi")
+    cache = MarkdownCache()
+
+    source, meta = cache.load(filepath)
+    assert source == "# Hi"
+    assert meta == {"title": "Hello"}
+
+    # Modifying the returned meta doesn't affect the cached one
+    meta.pop("title")
+    source, meta = cache.load(filepath)
+    assert meta == {"title": "Hello"}
+
+
+def test_markdown_cache_changed_file(tmp_path):
+    filepath = tmp_path / "page.md"
+    filepath.write_text("---\ntitle: Hello\n---\n# Hi")
+    cache = MarkdownCache()
+    cache.load(filepath)
+
+    filepath.write_text("---\ntitle: Bye\n---\n# Bye bye")
+    stat = filepath.stat()
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    source, meta = cache.load(filepath)
+    assert source == "# Bye bye"
+    assert meta == {"title": "Bye"}
+    assert cache.size == stat.st_size
+
+
+def test_markdown_cache_max_size(tmp_path):
+    cache = MarkdownCache(max_size=20)
+    for name in "abc":
+        (tmp_path / f"{name}.md").write_text("0123456789")
+        cache.load(tmp_path / f"{name}.md")
+
+    assert cache.size == 20
+    assert list(cache._entries) == [str(tmp_path / "b.md"), str(tmp_path / "c.md")]
+
+
+def test_markdown_cache_discard(tmp_path):
+    cache = MarkdownCache()
+    for name in "ab":
+        (tmp_path / f"{name}.md").write_text("0123456789")
+        cache.load(tmp_path / f"{name}.md")
+
+    cache.discard(tmp_path / "a.md")
+    cache.discard(tmp_path / "nope.md")
+    assert cache.size == 10
+    assert list(cache._entries) == [str(tmp_path / "b.md")]